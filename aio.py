@@ -0,0 +1,79 @@
+#----------------------------------------------------------------------------#
+# Concurrent execution of independent read queries.
+#
+# With ASYNC_QUERIES enabled, a page that needs several independent queries
+# (e.g. the venue row and its show timeline) hands their statements to
+# gather(), which runs them at the same time on an async engine (asyncpg on
+# PostgreSQL) and waits for all of them. The async engine lives on one event
+# loop thread per process, so views stay ordinary functions and the app runs
+# unchanged under the threaded WSGI workers.
+#----------------------------------------------------------------------------#
+import asyncio
+import os
+import threading
+
+# SQLALCHEMY_ENGINE_OPTIONS keys that also apply to the async engine; its
+# size is its own (ASYNC_POOL_SIZE, ASYNC_MAX_OVERFLOW)
+POOL_OPTIONS = ('pool_timeout', 'pool_recycle', 'pool_pre_ping')
+ASYNC_DRIVERS = {
+  'postgresql': 'postgresql+asyncpg',
+  'postgres': 'postgresql+asyncpg',
+  'postgresql+psycopg2': 'postgresql+asyncpg',
+  'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_url(url):
+  scheme, sep, rest = url.partition('://')
+  return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+class AsyncQueries:
+
+  def __init__(self, app=None):
+    self.enabled = False
+    self._engine = None
+    self._loop = None
+    self._pid = None
+    self._lock = threading.Lock()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    app.config.setdefault('ASYNC_QUERIES', False)
+    self.enabled = app.config['ASYNC_QUERIES']
+    # detail pages are read-only, so prefer the replica when there is one
+    self.url = app.config.get('ASYNC_DATABASE_URI') or async_url(
+      app.config.get('DATABASE_REPLICA_URL') or app.config['SQLALCHEMY_DATABASE_URI'])
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    self.engine_options = {key: options[key] for key in POOL_OPTIONS if key in options}
+    if not self.url.startswith('sqlite'):
+      # the async engine's connections come on top of the primary pool's
+      self.engine_options.update(pool_size=app.config.get('ASYNC_POOL_SIZE', 4),
+                                 max_overflow=app.config.get('ASYNC_MAX_OVERFLOW', 0))
+    app.extensions['async_queries'] = self
+
+  def _start(self):
+    # The loop and engine are created on first use in each process, so that
+    # pre-forking servers don't share them between workers.
+    from sqlalchemy.ext.asyncio import create_async_engine
+    with self._lock:
+      if self._pid == os.getpid():
+        return
+      self._loop = asyncio.new_event_loop()
+      threading.Thread(target=self._loop.run_forever, name='async-queries', daemon=True).start()
+      self._engine = create_async_engine(self.url, **self.engine_options)
+      self._pid = os.getpid()
+
+  async def _fetch(self, statement):
+    async with self._engine.connect() as connection:
+      return (await connection.execute(statement)).all()
+
+  async def _gather(self, statements):
+    return await asyncio.gather(*(self._fetch(statement) for statement in statements))
+
+  def gather(self, *statements):
+    # runs the statements concurrently and returns their rows, in order
+    if self._pid != os.getpid():
+      self._start()
+    return asyncio.run_coroutine_threadsafe(self._gather(statements), self._loop).result()
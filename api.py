@@ -0,0 +1,156 @@
+#----------------------------------------------------------------------------#
+# Streaming JSON API.
+#
+# Every listing is read through a server-side cursor and written out as it
+# is fetched, so memory stays flat and the first byte leaves immediately.
+# Responses are a JSON array by default, or newline-delimited JSON with
+# ?format=ndjson or an Accept header that names application/x-ndjson above
+# application/json; wildcards such as */* get the JSON array.
+#----------------------------------------------------------------------------#
+import json
+from datetime import date, datetime
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from models import db, Venue, Artist, Show, UpcomingShow
+from database import read_only
+from pagination import InvalidCursor
+import facets
+import scheduling
+import feed
+from serializers import VENUE_FIELDS, ARTIST_FIELDS, venue_dict, artist_dict, show_dict
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+NDJSON = 'application/x-ndjson'
+
+
+def _default(value):
+  if isinstance(value, (datetime, date)):
+    return value.isoformat()
+  raise TypeError('%r is not JSON serializable' % value)
+
+
+def _wants_ndjson():
+  if request.args.get('format') == 'ndjson':
+    return True
+  # only exact entries count: */* or application/* match both types
+  quality = {NDJSON: 0, 'application/json': 0}
+  for value, q in request.accept_mimetypes:
+    if value in quality:
+      quality[value] = max(quality[value], q)
+  return quality[NDJSON] > quality['application/json']
+
+
+def stream(query, to_dict):
+  # query yields rows in batches of API_YIELD_PER from a server-side cursor
+  rows = query.yield_per(current_app.config.get('API_YIELD_PER', 1000))
+  encode = json.JSONEncoder(default=_default, separators=(',', ':')).encode
+
+  if _wants_ndjson():
+    def generate():
+      for row in rows:
+        yield encode(to_dict(row)) + '\n'
+    mimetype = NDJSON
+  else:
+    def generate():
+      yield '['
+      separator = ''
+      for row in rows:
+        yield separator + encode(to_dict(row))
+        separator = ','
+      yield ']'
+    mimetype = 'application/json'
+
+  return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+@api.route('/venues')
+@read_only
+def venues():
+  columns = [getattr(Venue, field) for field in VENUE_FIELDS]
+  return stream(db.session.query(*columns).order_by(Venue.id), venue_dict)
+
+
+@api.route('/artists')
+@read_only
+def artists():
+  columns = [getattr(Artist, field) for field in ARTIST_FIELDS]
+  return stream(db.session.query(*columns).order_by(Artist.id), artist_dict)
+
+
+@api.route('/shows')
+@read_only
+def shows():
+  query = db.session.query(
+      Show.start_time.label('start_time'),
+      Venue.id.label('venue_id'),
+      Venue.name.label('venue_name'),
+      Artist.id.label('artist_id'),
+      Artist.name.label('artist_name'),
+      Artist.image_link.label('artist_image_link')
+    ).join(Artist, Show.artist_id == Artist.id) \
+    .join(Venue, Show.venue_id == Venue.id) \
+    .order_by(Show.start_time, Show.id)
+  return stream(query, show_dict)
+
+
+@api.route('/shows/upcoming')
+@read_only
+def upcoming_shows():
+  # ?from=&to=&city=&state=, as on /shows; read from the feed table
+  try:
+    query = feed.upcoming_query(*feed.parse_range(request.args))
+  except ValueError:
+    abort(400)
+  return stream(query.order_by(UpcomingShow.start_time, UpcomingShow.show_id), show_dict)
+
+
+@api.route('/shows/schedule', methods=['POST'])
+def schedule_shows():
+  # body: {"shows": [{"venue_id", "artist_id", "start_time"}, ...]} or the bare
+  # list. 201 when every show was created, 200 when some were rejected.
+  body = request.get_json(silent=True)
+  rows = body.get('shows') if isinstance(body, dict) else body
+  if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+    abort(400)
+  if len(rows) > current_app.config.get('SCHEDULE_MAX_SHOWS', 5000):
+    abort(413)
+  outcomes = scheduling.schedule_shows(rows)
+  created = sum(1 for outcome in outcomes if outcome['status'] == scheduling.CREATED)
+  response = jsonify({
+    'created': created,
+    'rejected': len(outcomes) - created,
+    'results': outcomes,
+  })
+  response.status_code = 201 if created == len(outcomes) else 200
+  return response
+
+
+def browse(model, kind):
+  # ?genre= (repeatable), ?city=, ?state=, ?after= cursor; responses are
+  # cached per filter combination for FACET_CACHE_TIMEOUT seconds
+  genres = sorted(set(request.args.getlist('genre')))
+  city = request.args.get('city') or None
+  state = request.args.get('state') or None
+  after = request.args.get('after') or None
+  per_page = request.args.get('per_page', current_app.config.get('LISTING_PER_PAGE', 50), type=int)
+  per_page = min(max(per_page, 1), 100)
+  key = 'browse:%s:%s' % (kind, json.dumps([genres, city, state, after, per_page]))
+  timeout = current_app.config.get('FACET_CACHE_TIMEOUT', 60)
+  try:
+    result = current_app.extensions['cache'].get_or_build(key, lambda: (
+      facets.browse(model, genres, city, state, after=after, per_page=per_page), timeout))
+  except InvalidCursor:
+    abort(400)
+  return jsonify(result)
+
+
+@api.route('/venues/browse')
+@read_only
+def browse_venues():
+  return browse(Venue, 'venue')
+
+
+@api.route('/artists/browse')
+@read_only
+def browse_artists():
+  return browse(Artist, 'artist')
@@ -1,119 +1,104 @@
 #----------------------------------------------------------------------------#
 # Imports
 #----------------------------------------------------------------------------#
+import os
 import sys
 import json
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
+from datetime import datetime
+from itertools import groupby
+from flask import Blueprint, Flask, current_app, g, render_template, request, Response, flash, redirect, url_for, abort
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import ARRAY
+from database import read_only
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
 from forms import *
-from flask_migrate import Migrate
-from models import db, Venue, Artist, Show
+from models import db, Venue, Artist, Show, UpcomingShow
+import search
+import scheduling
+import jobs
+import feed
+from timeline import timeline_query, split_timeline
+from pagination import keyset_page, InvalidCursor
+from cache import Cache
+from serializers import VENUE_FIELDS, ARTIST_FIELDS, venue_dict, artist_dict, show_dict
+from api import api
+from commands import fyyur
+from profiler import SQLProfiler
+from filters import format_datetime
+from aio import AsyncQueries
+from fragments import FragmentCache
+from jobs import JobQueue
+from ratelimit import RateLimiter
+from http_cache import conditional, built_from, venues_state, artists_state, shows_state, venue_state, artist_state
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')# load all settings from config
-db = SQLAlchemy(app)
-
-migrate = Migrate(app, db)
-
-
-# TODO: connect to a local postgresql database
-db.create_all() 
-db.init_app(app)
-#----------------------------------------------------------------------------#
-# Models.
-#----------------------------------------------------------------------------#
-
-class Venue(db.Model):
-    __tablename__ = 'Venue'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
-    address = db.Column(db.String(120))
-    phone = db.Column(db.String(120))
-    image_link = db.Column(db.String(500))
-    facebook_link = db.Column(db.String(120))
-    
-    genres = db.Column(ARRAY(db.String(120))
-    website = db.Column(db.String(120))
-    seeking_talent = db.Column(db.Boolean)
-    seeking_description = db.Column(db.String())
-
-    def __repr__(self):
-       return f'<id: {self.id}, name: {self.name}>'
-
-    # TODO: implement any missing fields, as a database migration using Flask-Migrate
-
-class Artist(db.Model):
-    __tablename__ = 'Artist'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
-    phone = db.Column(db.String(120))
-    genres = db.Column(ARRAY(db.String(120)))
-    image_link = db.Column(db.String(500))
-    facebook_link = db.Column(db.String(120))
-                       
-    
-    website = db.Column(db.String())
-    seeking_venue = db.Column(db.Boolean)
-    seeking_description = db.Column(db.String())
-
-    def __repr__(self):
-        return f'<id: {self.id}, name: {self.name}>'
-
-    # TODO: implement any missing fields, as a database migration using Flask-Migrate
-
-
-
-# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
-class Show(db.Model):
-    __tablename__ = 'Show'
-                       
-    id = db.Column(db.Integer, primary_key=True)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
-    start_time = db.Column(db.DateTime)
-    venue_name = db.relationship('Venue', backref=db.backref('shows'), lazy='dynamic')                   
-    artist = db.relationship('Artist', backref=db.backref('shows'), lazy='dynamic')
-                       
-    def __repr__(self):
-        return f'<id: {self.id}>'
-
-db.create_all() 
-#----------------------------------------------------------------------------#
-# Filters.
-#----------------------------------------------------------------------------#
-
-def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format, locale='en')
-
-app.jinja_env.filters['datetime'] = format_datetime
+moment = Moment()
+cache = Cache()
+async_queries = AsyncQueries()
+fragments = FragmentCache()
+profiler = SQLProfiler()
+job_queue = JobQueue()
+limiter = RateLimiter()
+profiler.register_metric('fyyur_cache_hits_total', 'Detail page cache hits.', lambda: cache.stats()['hits'])
+profiler.register_metric('fyyur_cache_misses_total', 'Detail page cache misses.', lambda: cache.stats()['misses'])
+profiler.register_metric('fyyur_cache_coalesced_total', 'Cache misses that waited for a concurrent build.',
+                         lambda: cache.stats()['coalesced'])
+
+pages = Blueprint('pages', __name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def init_migrate(app):
+  # Flask-Migrate, and with it alembic, is only imported by what needs the
+  # schema: the `flask db` commands, and tests and benchmarks, which run
+  # flask_migrate.upgrade() on their database
+  from flask_migrate import Migrate
+  return Migrate(app, db, directory=MIGRATIONS_DIR)
+
+
+def create_app(config='config'):
+  # config is anything app.config.from_object() takes: an import path or an
+  # object. Nothing here touches the database; the schema is managed with
+  # the revisions under migrations/ (flask db upgrade).
+  app = Flask(__name__)
+  app.config.from_object(config)
+  moment.init_app(app)
+  db.init_app(app)
+  if os.environ.get('FLASK_RUN_FROM_CLI'):
+    init_migrate(app)
+  cache.init_app(app)
+  async_queries.init_app(app)
+  fragments.init_app(app)
+  profiler.init_app(app)
+  job_queue.init_app(app)
+  limiter.init_app(app)
+  app.jinja_env.filters['datetime'] = format_datetime
+  app.register_blueprint(pages)
+  app.register_blueprint(api)
+  app.cli.add_command(fyyur)
+
+  if not app.debug:
+      file_handler = FileHandler('error.log')
+      file_handler.setFormatter(
+          Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+      )
+      app.logger.setLevel(logging.INFO)
+      file_handler.setLevel(logging.INFO)
+      app.logger.addHandler(file_handler)
+      app.logger.info('errors')
+  return app
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
+@pages.route('/')
 def index():
   return render_template('pages/home.html')
 
@@ -121,107 +106,135 @@ def index():
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@pages.route('/venues')
+@read_only
+@conditional(venues_state)
 def venues():
-  # TODO: replace with real venues data.
-  #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
+  # one query for every area: each venue row carries its city/state and its
+  # precomputed number of upcoming shows (see counters.py)
+  rows = db.session.query(
+      Venue.city,
+      Venue.state,
+      Venue.id,
+      Venue.name,
+      Venue.upcoming_shows_count.label('num_upcoming_shows'),
+      Venue.updated_at.label('version')
+    ).order_by(Venue.state, Venue.city, Venue.name) \
+    .all()
+
   data = []
-  cities = db.session.query(Venue.city, Venue.state).distinct(Venue.city, Venue.state)
-                       
-  for city in cities: 
-    venues_in_city = db. session.query(Venue.id, Venue.name).filter(Venue.city==city[0]).filter(Venue.state==city[1])
+  for (city, state), venues_in_city in groupby(rows, key=lambda row: (row.city, row.state)):
     data.append({
-        "city":city[0],
-        "state":city[1],
-        "venues":venues_in_city
+        "city": city,
+        "state": state,
+        "venues": [{
+          "id": venue.id,
+          "name": venue.name,
+          "num_upcoming_shows": venue.num_upcoming_shows,
+          "version": venue.version
+        } for venue in venues_in_city]
     })
 
-  return render_template('pages/venues.html', areas=data);
+  return render_template('pages/venues.html', areas=data)
                        
 # Search venue-----------------------------------------------------------
                        
-@app.route('/venues/search', methods=['POST'])
+def cached_search(kind, search_fn, search_term):
+  # identical searches share one query while it runs (see Cache.get_or_build)
+  # and its result for SEARCH_CACHE_TIMEOUT seconds; matching is
+  # case-insensitive, so the term's case doesn't matter
+  page = request.values.get('page', 1, type=int)
+  per_page = request.values.get('per_page', search.DEFAULT_PER_PAGE, type=int)
+  key = 'search:%s:%s' % (kind, json.dumps([search_term.lower(), page, per_page]))
+  return cache.get_or_build(key, lambda: (
+    search_fn(search_term, page=page, per_page=per_page),
+    current_app.config.get('SEARCH_CACHE_TIMEOUT', 10)))
+
+@pages.route('/venues/search', methods=['POST'])
+@limiter.limit('search')
+@read_only
 def search_venues():
-  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
-  # seach for Hop should return "The Musical Hop".
-  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+  # case-insensitive partial match on the venue name:
+  # search for "Hop" returns "The Musical Hop".
+  # search for "Music" returns "The Musical Hop" and "Park Square Live Music & Coffee"
   search_term = request.form.get('search_term', '')
-  venues = db.session.query(Venue).filter(Venue.name.ilike('%' + search_term + '%')).all()
-  data = []
-  for venue in venues: 
-      num_upcoming_shows = 0
-      shows = db.session.query(Show).filter(show.venue_id == venue.id)
-      for show in shows:
-          if (show.start_time > datetime.now()):
-              num_upcoming_shows += 1; 
-      data.append({
-        "id": venue.id,
-        "name": venue.name,
-        "num_upcoming_shows": num_upcoming_shows   
-      })
-  
-
-  response= {
-     "count": len(venues),
-      "data": data
-  }
-  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+  response = cached_search('venue', search.search_venues, search_term)
+  return render_template('pages/search_venues.html', results=response, search_term=search_term)
 
 # Show Venue--------------------------------------------------
+
+def detail_timeout(next_start_time):
+  # cached detail pages expire no later than the moment their soonest
+  # upcoming show becomes a past one
+  timeout = current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+  if next_start_time is not None:
+    timeout = min(timeout, (next_start_time - datetime.now()).total_seconds())
+  return max(int(timeout), 0)
+
+def fetch_all(*queries):
+  # rows of independent queries: concurrently when ASYNC_QUERIES is on,
+  # otherwise one after another on the request's session
+  if async_queries.enabled:
+    return async_queries.gather(*[query.statement for query in queries])
+  return [query.all() for query in queries]
+
+def cached_detail(key, build):
+  # A detail page's data from the cache. build(version) records the
+  # validator version the data was built at (see http_cache.conditional);
+  # an entry whose version differs from this request's is stale, e.g. left
+  # by a write another process handled, and is rebuilt. The version of the
+  # data actually served goes into the ETag.
+  version = g.get('page_version')
+  data = cache.get_or_build(key, lambda: build(version),
+                            valid=lambda data: version is None or data['version'] == version)
+  if data is not None:
+    built_from(data['version'])
+  return data
+
+VENUE_SHOW_COLUMNS = [
+  Artist.id.label('artist_id'),
+  Artist.name.label('artist_name'),
+  Artist.image_link.label('artist_image_link')
+]
+
+def venue_detail(venue_id, version=None):
+  venue_query = db.session.query(*[getattr(Venue, field) for field in VENUE_FIELDS]) \
+    .filter(Venue.id == venue_id)
+  shows_query = timeline_query(Show.venue_id, venue_id, Artist, Show.artist_id == Artist.id,
+                               VENUE_SHOW_COLUMNS, limit=current_app.config.get('DETAIL_SHOWS_LIMIT'))
+  venue_rows, show_rows = fetch_all(venue_query, shows_query)
+  if not venue_rows:
+    return None, None
+  shows = split_timeline(show_rows, VENUE_SHOW_COLUMNS)
+  next_start_time = shows.pop('next_start_time')
+
+  data = {**venue_dict(venue_rows[0]), **shows, 'version': version}
+  return data, detail_timeout(next_start_time)
+
+def invalidate_venue(venue_id, artist_ids=None):
+  # after the commit: the venue's page and the pages of the artists playing
+  # there; artist_ids is given when the venue's shows are already deleted
+  if artist_ids is None:
+    artist_ids = [id for id, in db.session.query(Show.artist_id)
+                  .filter(Show.venue_id == venue_id).distinct()]
+  keys = ['venue:%s' % venue_id] + ['artist:%s' % id for id in artist_ids]
+  cache.delete(*keys)
+  fragments.invalidate(*keys)
                        
-@app.route('/venues/<int:venue_id>')
+@pages.route('/venues/<int:venue_id>')
+@read_only
+@conditional(venue_state)
 def show_venue(venue_id):
   # shows the venue page with the given venue_id
-  # TODO: replace with real venue data from the venues table, using venue_id
-  venue = Venue.query.get(venue_id)
-  if not venue: 
-    return render_template('errors/404.html') 
-  upcoming_shows_query = db.session.query(Show).join(Artist).filter(Show.venue_id==venue.id).filter(Show.start_time>datetime.now()).all() 
-  upcoming_shows=[] 
-  
-  past_shows_query = db.session.query(Show).join(Artist).filter(Show.venue_id==venue.id).filter(Show.start_time<datetime.now()).all() 
-  past_shows=[] 
-
-  for show in past_shows_query: 
-    past_shows.append({
-      "artist_id": show.artist_id,
-      "artist_name": show.artist.name,
-      "artist_image_link": show.artist.image_link,
-      "start_time": show.start_time.strftime('%d/%m/%Y')
-    })
-  for show in upcoming_shows_query: 
-    upcoming_shows.append({
-      "artist_id": show.artist_id,
-      "artist_name": show.artist.name,
-      "artist_image_link": show.artist.image_link,
-      "start_time": show.start_time.strftime('%d/%m/%Y')
-    })
-                                   
-   data = {
-    "id": venue.id,
-    "name": venue.name,
-    "genres": venue.genres,
-    "address": venue.address,
-    "city": venue.city,
-    "state": venue.state,
-    "phone": venue.phone,
-    "website": venue.website,
-    "facebook_link": venue.facebook_link,
-    "seeking_talent": venue.seeking_talent,
-    "seeking_description": venue.seeking_description,
-    "image_link": venue.image_link,
-    "past_shows": past_shows,
-    "upcoming_shows": upcoming_shows,
-    "past_shows_count": len(past_shows),
-    "upcoming_shows_count": len(upcoming_shows),
-  }
-
+  data = cached_detail('venue:%s' % venue_id, lambda version: venue_detail(venue_id, version))
+  if data is None:
+    return render_template('errors/404.html'), 404
   return render_template('pages/show_venue.html', venue=data)
 
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET'])
+@pages.route('/venues/create', methods=['GET'])
 def create_venue_form():
   form = VenueForm()
   return render_template('forms/new_venue.html', form=form)
@@ -232,7 +245,7 @@ def create_venue_form():
      
   # TODO: on unsuccessful db insert, flash an error instead.
                        
-@app.route('/venues/create', methods=['POST'])
+@pages.route('/venues/create', methods=['POST'])
 def create_venue_submission():
   error = False
   try: 
@@ -250,6 +263,8 @@ def create_venue_submission():
     
     venue = Venue(name=name, city=city, state=state, address=address, phone=phone, genres=genres, facebook_link=facebook_link, image_link=image_link, website=website, seeking_talent=seeking_talent, seeking_description=seeking_description)
     db.session.add(venue) 
+    db.session.flush()
+    jobs.enqueue('check_image', entity='venue', id=venue.id)
     db.session.commit() 
   except: 
     error = True
@@ -266,14 +281,20 @@ def create_venue_submission():
   # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
   return render_template('pages/home.html')
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@pages.route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
   # TODO: Complete this endpoint for taking a venue_id, and using
   # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
   error = False 
   try:
+      artist_ids = [id for id, in db.session.query(Show.artist_id)
+                    .filter(Show.venue_id == venue_id).distinct()]
+      db.session.query(Show).filter(Show.venue_id == venue_id).delete(synchronize_session=False)
       db.session.query(Venue).filter(Venue.id==venue_id).delete()
+      # the artists' counters catch up in the background
+      jobs.enqueue('recount', artist_ids=artist_ids)
       db.session.commit()
+      invalidate_venue(venue_id, artist_ids)
   except:
       error = True
       flash('An error has occurred')
@@ -287,88 +308,79 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists')
+@pages.route('/artists')
+@read_only
+@conditional(artists_state)
 def artists():
-  # TODO: replace with real data returned from querying the database
-  data = db.session.query(Artist).all() 
-  return render_template('pages/artists.html', artists=data)
-
-@app.route('/artists/search', methods=['POST'])
+  # one page of artists ordered by (name, id); ?after= carries the cursor
+  try:
+    data, next_after = keyset_page(
+      db.session.query(Artist.id, Artist.name, Artist.updated_at.label('version')),
+      (Artist.name, Artist.id), (str, int),
+      after=request.args.get('after'),
+      per_page=current_app.config['LISTING_PER_PAGE'])
+  except InvalidCursor:
+    abort(400)
+  return render_template('pages/artists.html', artists=data, next_after=next_after)
+
+@pages.route('/artists/search', methods=['POST'])
+@limiter.limit('search')
+@read_only
 def search_artists():
-  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
-  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
-  # search for "band" should return "The Wild Sax Band".
-  search_term = request.form.get('search_term', '') 
-  search_result = db.session.query(Artist).filter(Artist.name.ilike(f'%{search_term}%')).all() 
-  data = [] 
-  for result in search_result: 
-    data.append({
-      "id": result.id, 
-      "name": result.name,
-      "num_upcoming_shows": len(db.session.query(Show).filter(Show.artist_id == result.id)).filter(Show.start_time > datetime.now()).all()  
-    })
-                       
-                       
-   response=data
-  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
-
-@app.route('/artists/<int:artist_id>')
+  # case-insensitive partial match on the artist name:
+  # search for "A" returns "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" returns "The Wild Sax Band".
+  search_term = request.form.get('search_term', '')
+  response = cached_search('artist', search.search_artists, search_term)
+  return render_template('pages/search_artists.html', results=response, search_term=search_term)
+
+ARTIST_SHOW_COLUMNS = [
+  Venue.id.label('venue_id'),
+  Venue.name.label('venue_name'),
+  Venue.image_link.label('venue_image_link')
+]
+
+def artist_detail(artist_id, version=None):
+  artist_query = db.session.query(*[getattr(Artist, field) for field in ARTIST_FIELDS]) \
+    .filter(Artist.id == artist_id)
+  shows_query = timeline_query(Show.artist_id, artist_id, Venue, Show.venue_id == Venue.id,
+                               ARTIST_SHOW_COLUMNS, limit=current_app.config.get('DETAIL_SHOWS_LIMIT'))
+  artist_rows, show_rows = fetch_all(artist_query, shows_query)
+  if not artist_rows:
+    return None, None
+  shows = split_timeline(show_rows, ARTIST_SHOW_COLUMNS)
+  next_start_time = shows.pop('next_start_time')
+
+  data = {**artist_dict(artist_rows[0]), **shows, 'version': version}
+  return data, detail_timeout(next_start_time)
+
+def invalidate_artist(artist_id):
+  # after the commit: the artist's page and the pages of the venues it plays
+  venue_ids = [id for id, in db.session.query(Show.venue_id)
+               .filter(Show.artist_id == artist_id).distinct()]
+  keys = ['artist:%s' % artist_id] + ['venue:%s' % id for id in venue_ids]
+  cache.delete(*keys)
+  fragments.invalidate(*keys)
+
+@pages.route('/artists/<int:artist_id>')
+@read_only
+@conditional(artist_state)
 def show_artist(artist_id):
   # shows the artist page with the given artist_id
-  # TODO: replace with real artist data from the artist table, using artist_id
-  artist_query = db.session.query(Artist).get(artist.id)
-  
-  if not artist_query:
-    return render_template('error/404.html')
-                       
-  past_shows_query = db.session.query(Show).join(Venue).filter(Show.artist_id==artist_id).filter(Show.start_time < datetime.now()).all()
-  past_shows = [] 
-                       
-  for show in past_shows_query: 
-    past_shows.append({
-      "venue_id": show.venue_id,
-      "venue_name": show.venue.name,
-      "artist_image_link": show.venue,image_link,
-      "start_time": show.start_time.strftime('%d/%m/%Y')
-    })
-  upcoming_shows_query = db.session.query(Show).join(Venue).filter(Show.artist_id == artist_id).filter(Show.start_time > datetime.now()).all()
-  upcoming_shows = [] 
-  
-  for show in upcoming_shows_query:
-    upcoming_shows.append({
-      "venue_id": show.venue_id,
-      "venue_name": show.venue.name,
-      "artist_image_link": show.venue,image_link,
-      "start_time": show.start_time.strftime('%d/%m/%Y')
-    })
-                       
-  data = {
-    "id": artist_query.id,
-    "name": artist_query.name,
-    "genres": artist_query.genres,
-    "city": artist_query.city,
-    "state": artist_query.state,
-    "phone": artist_query.phone,
-    "website": artist_query.website,
-    "facebook_link": artist_query.facebook_link,
-    "seeking_venue": artist_query.seeking_venue,
-    "seeking_description": artist_query.seeking_description,
-    "image_link": artist_query.image_link,
-    "past_shows": past_shows,
-    "upcoming_shows": upcoming_shows,
-    "past_shows_count": len(past_shows),
-    "upcoming_shows_count": len(upcoming_shows),
-  }
-  
-    
+  data = cached_detail('artist:%s' % artist_id, lambda version: artist_detail(artist_id, version))
+  if data is None:
+    return render_template('errors/404.html'), 404
   return render_template('pages/show_artist.html', artist=data)
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@pages.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
   form = ArtistForm()
-  form_artist = db.session.query(Artist).get(artist_id)
+  # only the columns the form shows
+  form_artist = db.session.query(Artist) \
+    .options(load_only(*[getattr(Artist, field) for field in ARTIST_FIELDS])) \
+    .get(artist_id)
   artist={
     "id": form_artist.id,
     "name": form_artist.name,
@@ -385,7 +397,7 @@ def edit_artist(artist_id):
   # TODO: populate form with fields from artist with ID <artist_id>
   return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@pages.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
   # TODO: take values from the form submitted, and update existing
   # artist record with ID <artist_id> using the new attributes
@@ -395,14 +407,17 @@ def edit_artist_submission(artist_id):
       artist.name = request.form['name']
       artist.city = request.form['city']
       artist.state = request.form['state']
-      artist.phone = request.form[phone']
+      artist.phone = request.form['phone']
       artist.image_link = request.form['image_link']
       artist.facebook_link = request.form['facebook_link']
       artist.genres = request.form.getlist('genres')
       artist.website_link = request.form['website_link']
       artist.seeking_venue = True if 'seeking_venue' in request.form else False
       artist.seeking_description = request.form['seeking_description']
+      if inspect(artist).attrs.image_link.history.has_changes():
+        jobs.enqueue('check_image', entity='artist', id=artist_id)
       db.session.commit()
+      invalidate_artist(artist_id)
   except:
       error=True
       flash('An error has occurred')
@@ -410,29 +425,22 @@ def edit_artist_submission(artist_id):
   finally:
       db.session.close()
                     
-  return redirect(url_for('show_artist', artist_id=artist_id))
+  return redirect(url_for('pages.show_artist', artist_id=artist_id))
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@pages.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
-  form = VenueForm()
-  form_venue = db.session.query(Venue).get(venue_id)
-  venue={
-    form.name.data = form_venue.name
-    form.city.data = form_venue.city
-    form.state.data = form_venue.state
-    form.phone.data = form_venue.phone
-    form.address.data = form_venue.address
-    form.genres.data = form_venue.genres
-    form.facbook_link.data = form_venue.facebook_link
-    form.image_link.data = form_venue.image_link
-    form.website.data = form_venue.website
-    form.seeking_talent.data = form_venue.seeking_talent
-    form.seeking_description.data = form_venue.seeking_description 
-  }
+  form_venue = db.session.query(Venue) \
+    .options(load_only(*[getattr(Venue, field) for field in VENUE_FIELDS])) \
+    .get(venue_id)
+  if form_venue is None:
+    abort(404)
+  # fields are filled from the venue's attributes of the same name
+  form = VenueForm(obj=form_venue)
+  venue = venue_dict(form_venue)
   # TODO: populate form with values from venue with ID <venue_id>
   return render_template('forms/edit_venue.html', form=form, venue=venue)
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@pages.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
   try:
       venue = db.session.query(Venue).get(venue_id)
@@ -450,7 +458,10 @@ def edit_venue_submission(venue_id):
       else:
           venue.seeking_talent = False
       venue.seeking_description = request.form.get('seeking_description')
+      if inspect(venue).attrs.image_link.history.has_changes():
+        jobs.enqueue('check_image', entity='venue', id=venue_id)
       db.session.commit()
+      invalidate_venue(venue_id)
   except:
       flash('An error has occurred')
       db.session.rollback()
@@ -458,17 +469,17 @@ def edit_venue_submission(venue_id):
       db.session.close()
   # TODO: take values from the form submitted, and update existing
   # venue record with ID <venue_id> using the new attributes
-  return redirect(url_for('show_venue', venue_id=venue_id))
+  return redirect(url_for('pages.show_venue', venue_id=venue_id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET'])
+@pages.route('/artists/create', methods=['GET'])
 def create_artist_form():
   form = ArtistForm()
   return render_template('forms/new_artist.html', form=form)
 
-@app.route('/artists/create', methods=['POST'])
+@pages.route('/artists/create', methods=['POST'])
 def create_artist_submission():
   # called upon submitting the new artist listing form
   # TODO: insert form data as a new Venue record in the db, instead
@@ -489,6 +500,8 @@ def create_artist_submission():
     artist = Artist(name=name, city=city, state=state, phone=phone, genres=genres, facebook_link=facebook_link, image_link=image_link, website=website,seeking_venue=seeking_venue)
     # on successful db insert, flash success
     db.session.add(artist)
+    db.session.flush()
+    jobs.enqueue('check_image', entity='artist', id=artist.id)
     db.session.commit()
     flash('Artist ' + request.form['name'] + ' was successfully listed!')
     # TODO: on unsuccessful db insert, flash an error instead.
@@ -504,43 +517,84 @@ def create_artist_submission():
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@pages.route('/shows')
+@read_only
+@conditional(shows_state)
 def shows():
-  # displays list of shows at /shows
-  # TODO: replace with real venues data.
-  shows_query = db.session.query(Show).join(Artist).join(Venue).all()
+  # displays one page of shows at /shows, ordered by (start_time, id);
+  # ?after= carries the cursor of the next page
+  if any(request.args.get(key) for key in feed.RANGE_ARGS):
+    return upcoming_shows()
+  try:
+    shows_query, next_after = keyset_page(
+      db.session.query(
+        Show.id.label('id'),
+        Show.start_time.label('start_time'),
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Artist.id.label('artist_id'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.updated_at.label('show_updated_at'),
+        Venue.updated_at.label('venue_updated_at'),
+        Artist.updated_at.label('artist_updated_at')
+      ).join(Artist, Show.artist_id == Artist.id).join(Venue, Show.venue_id == Venue.id),
+      (Show.start_time, Show.id), (datetime.fromisoformat, int),
+      after=request.args.get('after'),
+      per_page=current_app.config['LISTING_PER_PAGE'])
+  except InvalidCursor:
+    abort(400)
   data = [] 
   for show in shows_query:
     data.append({
-        "venue_id": show.venue_id,
-        "venue_name": show.venue_name, 
-        "artist_id": show.artist_id,
-        "artist_name": show.artist_name,
-        "artist_image_link": show.artist.image_link
-        "start_time":show.start_time.strftime('%d/%m/%Y')
+      **show_dict(show),
+      "id": show.id,
+      # a show row changes with its own, its venue's or its artist's record
+      "version": (show.show_updated_at, show.venue_updated_at, show.artist_updated_at)
     })
-  return render_template('pages/shows.html', shows=data)
+  return render_template('pages/shows.html', shows=data, next_after=next_after)
 
-@app.route('/shows/create')
+def upcoming_shows():
+  # /shows?from=&to=&city=&state=: the upcoming shows in a date range, read
+  # from the denormalized feed table (see feed.py)
+  try:
+    rows, next_after = keyset_page(
+      feed.upcoming_query(*feed.parse_range(request.args)),
+      (UpcomingShow.start_time, UpcomingShow.show_id), (datetime.fromisoformat, int),
+      after=request.args.get('after'),
+      per_page=current_app.config['LISTING_PER_PAGE'])
+  except (InvalidCursor, ValueError):
+    abort(400)
+  data = [{
+    **show_dict(show),
+    "id": show.show_id,
+    # a feed row changes only through the fields it shows
+    "version": (show.start_time, show.venue_name, show.artist_name, show.artist_image_link)
+  } for show in rows]
+  return render_template('pages/shows.html', shows=data, next_after=next_after)
+
+@pages.route('/shows/create')
 def create_shows():
   # renders form. do not touch.
   form = ShowForm()
   return render_template('forms/new_show.html', form=form)
 
-@app.route('/shows/create', methods=['POST'])
+@pages.route('/shows/create', methods=['POST'])
 def create_show_submission():
   # called to create new shows in the db, upon submitting new show listing form
   # TODO: insert form data as a new Show record in the db, instead
+  # same checks as the bulk endpoint: both sides exist and neither is booked
   try:
-      venue_id = request.form['venue_id']
-      artist_id = request.form['artist_id']
-      start_time = request.form['start_time']
-      show = Show(venue_id=venue_id, artist_id=artist_id, start_time=start_time)
-      # on successful db insert, flash success
-      db.session.add(show)
-      db.session.commit()
-      flash('Show was successfully listed!')
-  # TODO: on unsuccessful db insert, flash an error instead.
+      outcome, = scheduling.schedule_shows([{
+        'venue_id': request.form['venue_id'],
+        'artist_id': request.form['artist_id'],
+        'start_time': request.form['start_time'],
+      }])
+      if outcome['status'] == scheduling.CREATED:
+        flash('Show was successfully listed!')
+      else:
+        messages = [m for errors in outcome['errors'].values() for m in errors]
+        flash('Show could not be listed. ' + ' '.join(messages))
   except:
       flash('An error has occurred. Show could not be listed.')
       db.session.rollback()
@@ -550,36 +604,26 @@ def create_show_submission():
   # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
   return render_template('pages/home.html')
 
-@app.errorhandler(404)
+@pages.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@pages.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
 
-# Default port:
+# Default port (development server; see gunicorn.conf.py for production):
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,90 @@
+#----------------------------------------------------------------------------#
+# Latency, query count and peak memory of every controller in app.py. That
+# the read pages issue a constant number of queries is checked by
+# tests/test_query_counts.py.
+#
+#   DATABASE_URL=postgresql://localhost/fyyur_bench BENCH_SHOWS=1000000 \
+#     pytest benchmarks/bench_controllers.py --benchmark-autosave
+#   pytest benchmarks/bench_controllers.py --benchmark-compare
+#
+# Results, including the extra query/percentile/memory figures below, are
+# saved as JSON under .benchmarks/ by pytest-benchmark, so runs from two
+# commits can be compared with --benchmark-compare.
+#----------------------------------------------------------------------------#
+import re
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def run(benchmark, call):
+  # benchmarks call(), then records the statement count reported by the
+  # profiler, latency percentiles and the peak memory of one extra call
+  response = benchmark(call)
+  assert response.status_code < 400, response.status_code
+
+  match = QUERIES.search(response.headers.get('Server-Timing', ''))
+  benchmark.extra_info['queries'] = int(match.group(1)) if match else None
+
+  timings = sorted(benchmark.stats.stats.data)
+  for p in (50, 95, 99):
+    benchmark.extra_info['p%d_ms' % p] = timings[min(len(timings) - 1, len(timings) * p // 100)] * 1000
+
+  tracemalloc.start()
+  call()
+  benchmark.extra_info['peak_kib'] = tracemalloc.get_traced_memory()[1] // 1024
+  tracemalloc.stop()
+
+
+# Lists ------------------------------------------------------------------------
+
+@pytest.mark.parametrize('path', ['/venues', '/artists', '/shows'])
+def test_list(benchmark, client, path):
+  run(benchmark, lambda: client.get(path))
+
+
+# Search -----------------------------------------------------------------------
+
+@pytest.mark.parametrize('path', ['/venues/search', '/artists/search'])
+@pytest.mark.parametrize('term', ['a', 'the', 'band', 'zzzz'])
+def test_search(benchmark, client, path, term):
+  run(benchmark, lambda: client.post(path, data={'search_term': term}))
+
+
+# Detail -----------------------------------------------------------------------
+
+@pytest.mark.parametrize('case', [0, 1], ids=['busiest', 'quietest'])
+@pytest.mark.parametrize('kind', ['venue', 'artist'])
+def test_detail(benchmark, client, sample_ids, kind, case):
+  path = '/%ss/%d' % (kind, sample_ids[kind][case])
+  run(benchmark, lambda: client.get(path))
+
+
+# Create -----------------------------------------------------------------------
+
+def test_create_venue(benchmark, client):
+  run(benchmark, lambda: client.post('/venues/create', data={
+    'name': 'Bench Venue', 'city': 'San Francisco', 'state': 'CA', 'address': '1 Main St',
+    'phone': '415-000-0000', 'genres': ['Jazz'], 'image_link': '', 'facebook_link': '',
+    'website': '', 'seeking_description': '',
+  }))
+
+
+def test_create_artist(benchmark, client):
+  run(benchmark, lambda: client.post('/artists/create', data={
+    'name': 'Bench Artist', 'city': 'San Francisco', 'state': 'CA', 'phone': '415-000-0000',
+    'genres': ['Jazz'], 'image_link': '', 'facebook_link': '', 'website': '',
+    'seeking_description': '',
+  }))
+
+
+def test_create_show(benchmark, client, sample_ids):
+  # a new slot on every call, a year out, so every round creates a show
+  # instead of being rejected as already booked
+  run(benchmark, lambda: client.post('/shows/create', data={
+    'venue_id': sample_ids['venue'][1], 'artist_id': sample_ids['artist'][1],
+    'start_time': (datetime.now() + timedelta(days=365)).isoformat(sep=' '),
+  }))
@@ -0,0 +1,58 @@
+#----------------------------------------------------------------------------#
+# Fixtures for the controller benchmarks (bench_controllers.py).
+#
+# The app runs against DATABASE_URL (see config.py) with the detail-page
+# cache and rate limiting disabled so every round hits the controllers.
+# The schema is brought up to date with the migrations, and an empty
+# database is seeded first with BENCH_SHOWS synthetic shows (seed.py).
+#----------------------------------------------------------------------------#
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CACHE_BACKEND', 'null')
+# every round comes from the same client: the rate limiter would answer 429
+os.environ['RATE_LIMIT_ENABLED'] = '0'
+
+
+@pytest.fixture(scope='session')
+def app():
+  from flask_migrate import upgrade
+  from app import create_app, init_migrate
+  from models import db, Show
+  import seed
+
+  app = create_app()
+  app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+  init_migrate(app)
+  with app.app_context():
+    upgrade()
+    if not db.session.query(Show.id).first():
+      shows = int(os.environ.get('BENCH_SHOWS', 10000))
+      seed.generate(max(shows // 50, 1), max(shows // 20, 1), shows)
+    yield app
+
+
+@pytest.fixture
+def client(app):
+  return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def sample_ids(app):
+  # the most and least booked venue/artist, for best and worst case detail pages
+  from models import db, Venue, Artist
+
+  def extremes(model):
+    busiest = db.session.query(model.id).order_by(
+      (model.upcoming_shows_count + model.past_shows_count).desc()).first()[0]
+    quietest = db.session.query(model.id).order_by(
+      (model.upcoming_shows_count + model.past_shows_count).asc()).first()[0]
+    return busiest, quietest
+
+  venues = extremes(Venue)
+  artists = extremes(Artist)
+  db.session.remove()
+  return {'venue': venues, 'artist': artists}
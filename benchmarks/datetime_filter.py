@@ -0,0 +1,75 @@
+#----------------------------------------------------------------------------#
+# Rendering 10k show rows through the `datetime` filter, before and after.
+#
+#   python benchmarks/datetime_filter.py --rows 10000
+#
+# "before" is the original filter: strftime in the controller, then
+# dateutil parsing and babel.dates.format_datetime for every row.
+#----------------------------------------------------------------------------#
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates
+import dateutil.parser
+from flask import Flask, render_template_string
+from filters import format_datetime
+
+ROWS = '{% for show in shows %}<li>{{ show.artist_name }} {{ show.start_time|datetime("full") }}</li>{% endfor %}'
+
+
+def legacy_format_datetime(value, format='medium'):
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format="EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format="EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format, locale='en')
+
+
+def make_shows(n):
+  # a realistic listing repeats start times: a few evening slots per day
+  rng = random.Random(42)
+  start = datetime(2026, 1, 1, 19, 0)
+  return [{
+    'artist_name': 'Artist %d' % i,
+    'start_time': start + timedelta(days=rng.randint(0, 365), hours=rng.choice([0, 1, 2, 3])),
+  } for i in range(n)]
+
+
+def render(app, filter, shows, repeat):
+  app.jinja_env.filters['datetime'] = filter
+  timings = []
+  with app.test_request_context():
+    render_template_string(ROWS, shows=shows)  # compile the template once
+    for _ in range(repeat):
+      started = time.perf_counter()
+      render_template_string(ROWS, shows=shows)
+      timings.append(time.perf_counter() - started)
+  return min(timings) * 1000
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark the datetime template filter.')
+  parser.add_argument('--rows', type=int, default=10000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  app = Flask(__name__)
+  shows = make_shows(args.rows)
+  # the controllers used to hand the filter strings
+  legacy_shows = [dict(show, start_time=show['start_time'].strftime('%Y-%m-%d %H:%M')) for show in shows]
+
+  before = render(app, legacy_format_datetime, legacy_shows, args.repeat)
+  after = render(app, format_datetime, shows, args.repeat)
+  print('before %8.1fms' % before)
+  print('after  %8.1fms  (%.1fx)' % (after, before / after))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,87 @@
+#----------------------------------------------------------------------------#
+# Artist name search latency: legacy ILIKE scan vs the indexed search path.
+#
+#   python benchmarks/search_latency.py --artists 1000000 --runs 200
+#
+# Runs against the database configured in config.py (SQLALCHEMY_DATABASE_URI).
+#----------------------------------------------------------------------------#
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_migrate import upgrade
+from sqlalchemy import func
+from app import create_app, init_migrate
+from models import db, Artist
+import search
+
+WORDS = ['band', 'sax', 'wild', 'petals', 'guns', 'music', 'hop', 'live', 'jazz',
+         'quartet', 'trio', 'collective', 'orchestra', 'the', 'kings', 'echo']
+TERMS = ['band', 'Sax', 'wild', 'petal', 'hop', 'jazz trio', 'orchestra', 'zzq']
+
+
+def seed(total, batch_size=10000):
+  existing = db.session.query(func.count(Artist.id)).scalar()
+  rng = random.Random(42)
+  for start in range(existing, total, batch_size):
+    rows = []
+    for _ in range(min(batch_size, total - start)):
+      words = rng.sample(WORDS, rng.randint(1, 3))
+      suffix = ''.join(rng.choice(string.ascii_lowercase) for _ in range(4))
+      rows.append({'name': ' '.join(words + [suffix]).title(), 'city': 'San Francisco', 'state': 'CA'})
+    db.session.execute(Artist.__table__.insert(), rows)
+    db.session.commit()
+  search.rebuild_index(Artist)
+
+
+def legacy_search(term):
+  # the pre-index query: an unanchored case-insensitive LIKE over every row.
+  # lower(name) is not covered by the trigram index, so this keeps the old
+  # sequential scan even once the index exists.
+  return db.session.query(Artist.id, Artist.name) \
+    .filter(func.lower(Artist.name).like('%' + term.lower() + '%')).all()
+
+
+def indexed_search(term):
+  return search.search_artists(term)
+
+
+def measure(fn, runs):
+  timings = []
+  for i in range(runs):
+    term = TERMS[i % len(TERMS)]
+    started = time.perf_counter()
+    fn(term)
+    timings.append((time.perf_counter() - started) * 1000)
+    db.session.rollback()
+  timings.sort()
+  return {
+    'p50': statistics.median(timings),
+    'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Compare artist search latency.')
+  parser.add_argument('--artists', type=int, default=1000000)
+  parser.add_argument('--runs', type=int, default=200)
+  args = parser.parse_args()
+
+  app = create_app()
+  init_migrate(app)
+  with app.app_context():
+    upgrade()
+    seed(args.artists)
+    for name, fn in (('legacy', legacy_search), ('indexed', indexed_search)):
+      result = measure(fn, args.runs)
+      print(f"{name:8} p50={result['p50']:.2f}ms p99={result['p99']:.2f}ms")
+
+
+if __name__ == '__main__':
+  main()
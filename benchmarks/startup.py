@@ -0,0 +1,84 @@
+#----------------------------------------------------------------------------#
+# Application startup time: cold import of app.py to the first response.
+#
+#   python benchmarks/startup.py --runs 20 --path / --target-ms 500
+#
+# Every run is a fresh interpreter, as in a gunicorn worker boot or a test
+# session, split into importing app.py, create_app() and the first request.
+# Exits non-zero when the median exceeds --target-ms, or when a module that
+# should load lazily (--lazy) was imported before the first request.
+#----------------------------------------------------------------------------#
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+loaded = set(sys.modules)
+status = application.test_client().get(sys.argv[1]).status_code
+served = time.perf_counter()
+print(json.dumps({
+  'import_ms': (imported - started) * 1000,
+  'create_ms': (created - imported) * 1000,
+  'request_ms': (served - created) * 1000,
+  'status': status,
+  'lazy_loaded': sorted(m for m in json.loads(sys.argv[2]) if m in loaded),
+}))
+'''
+
+
+def run_once(path, lazy):
+  started = time.perf_counter()
+  output = subprocess.run(
+    [sys.executable, '-c', CHILD, path, json.dumps(lazy)],
+    cwd=ROOT, check=True, capture_output=True, text=True
+  ).stdout
+  result = json.loads(output.strip().splitlines()[-1])
+  # includes interpreter startup
+  result['process_ms'] = (time.perf_counter() - started) * 1000
+  return result
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Measure cold application startup.')
+  parser.add_argument('--runs', type=int, default=20)
+  parser.add_argument('--path', default='/')
+  parser.add_argument('--target-ms', type=float, default=500,
+                      help='fail when the median import + create + first request exceeds this')
+  # babel is loaded lazily by filters.py too, but Flask-WTF imports it at
+  # startup for its translations whenever Flask-Babel is installed
+  parser.add_argument('--lazy', nargs='*', default=['dateutil'],
+                      help='modules that must not be imported before the first request')
+  args = parser.parse_args()
+
+  results = [run_once(args.path, args.lazy) for _ in range(args.runs)]
+  for key in ('import_ms', 'create_ms', 'request_ms', 'process_ms'):
+    print(f"{key:11} median={statistics.median(r[key] for r in results):8.1f} "
+          f"max={max(r[key] for r in results):8.1f}")
+  total = statistics.median(r['import_ms'] + r['create_ms'] + r['request_ms'] for r in results)
+  print(f"{'total_ms':11} median={total:8.1f} target={args.target_ms:.0f} "
+        f"status={results[-1]['status']}")
+
+  failed = False
+  if results[-1]['lazy_loaded']:
+    print('imported before the first request: ' + ', '.join(results[-1]['lazy_loaded']))
+    failed = True
+  if total > args.target_ms:
+    print('median startup is over the target')
+    failed = True
+  sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+  main()
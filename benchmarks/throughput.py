@@ -0,0 +1,68 @@
+#----------------------------------------------------------------------------#
+# Local load generator: requests per second and latency for a set of URLs.
+#
+#   python benchmarks/throughput.py http://localhost:5000 /venues/1 /artists/1 \
+#       --concurrency 32 --duration 30
+#
+# Run it once against each configuration (e.g. ASYNC_QUERIES=0 and 1) on the
+# same data and compare.
+#----------------------------------------------------------------------------#
+import argparse
+import itertools
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def worker(urls, deadline, timings, errors, lock):
+  for url in urls:
+    if time.perf_counter() >= deadline:
+      return
+    started = time.perf_counter()
+    try:
+      with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+      elapsed = time.perf_counter() - started
+      with lock:
+        timings.append(elapsed)
+    except (urllib.error.URLError, OSError):
+      with lock:
+        errors.append(url)
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Measure throughput of a running Fyyur server.')
+  parser.add_argument('base_url')
+  parser.add_argument('paths', nargs='+')
+  parser.add_argument('--concurrency', type=int, default=16)
+  parser.add_argument('--duration', type=float, default=20.0)
+  args = parser.parse_args()
+
+  lock = threading.Lock()
+  timings, errors = [], []
+  deadline = time.perf_counter() + args.duration
+  threads = []
+  for i in range(args.concurrency):
+    # each client cycles through the paths from a different starting point
+    paths = itertools.islice(itertools.cycle(args.paths), i % len(args.paths), None)
+    urls = (args.base_url.rstrip('/') + path for path in paths)
+    thread = threading.Thread(target=worker, args=(urls, deadline, timings, errors, lock))
+    thread.start()
+    threads.append(thread)
+  for thread in threads:
+    thread.join()
+
+  if not timings:
+    print('no successful requests (%d errors)' % len(errors))
+    return
+  timings.sort()
+  print('requests  %d (%d errors)' % (len(timings), len(errors)))
+  print('rps       %.1f' % (len(timings) / args.duration))
+  print('p50       %.1fms' % (statistics.median(timings) * 1000))
+  print('p99       %.1fms' % (timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,282 @@
+#----------------------------------------------------------------------------#
+# Bulk import/export of Venue, Artist and Show records.
+#
+# Rows are read from CSV or NDJSON, validated with the same rules as the
+# create forms and written in batches: COPY on PostgreSQL, executemany
+# elsewhere. Progress is checkpointed after every committed batch so an
+# interrupted import can be resumed, and a batch the database rejects is
+# retried row by row so only the offending rows are reported.
+#----------------------------------------------------------------------------#
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from sqlalchemy import text
+from werkzeug.datastructures import MultiDict
+from models import db, Venue, Artist, Show
+from forms import VenueForm, ArtistForm, ShowForm
+import counters
+import jobs
+import scheduling
+
+# multi-valued CSV cells, e.g. genres "Jazz;Swing"
+LIST_SEPARATOR = ';'
+
+ENTITIES = {
+  'venue': (Venue, VenueForm, ('name', 'city', 'state', 'address', 'phone', 'genres', 'image_link',
+                               'facebook_link', 'website', 'seeking_talent', 'seeking_description')),
+  'artist': (Artist, ArtistForm, ('name', 'city', 'state', 'phone', 'genres', 'image_link',
+                                  'facebook_link', 'website', 'seeking_venue', 'seeking_description')),
+  'show': (Show, ShowForm, ('venue_id', 'artist_id', 'start_time')),
+}
+LIST_COLUMNS = {'genres'}
+
+
+class RowError(Exception):
+
+  def __init__(self, line, errors):
+    super().__init__('row %d: %s' % (line, errors))
+    self.line = line
+    self.errors = errors
+
+#----------------------------------------------------------------------------#
+# Reading and validation.
+#----------------------------------------------------------------------------#
+
+def _detect_format(path, fmt):
+  if fmt:
+    return fmt
+  return 'ndjson' if path.endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+
+def read_rows(stream, fmt):
+  # yields (line number, {column: value or list of values})
+  if fmt == 'ndjson':
+    for line, raw in enumerate(stream, start=1):
+      if raw.strip():
+        yield line, json.loads(raw)
+  else:
+    # line 1 is the header
+    for line, row in enumerate(csv.DictReader(stream), start=2):
+      yield line, {
+        key: (value.split(LIST_SEPARATOR) if value else []) if key in LIST_COLUMNS else value
+        for key, value in row.items()
+      }
+
+
+def validate(entity, line, row):
+  # Runs the row through the entity's create form and returns the values to
+  # insert; raises RowError with the form's error messages.
+  model, form_class, columns = ENTITIES[entity]
+  formdata = MultiDict()
+  for key, value in row.items():
+    if isinstance(value, list):
+      formdata.setlist(key, [str(v) for v in value])
+    elif value is not None:
+      formdata.add(key, str(value) if not isinstance(value, bool) else ('y' if value else ''))
+  form = form_class(formdata=formdata, meta={'csrf': False})
+  if not form.validate():
+    raise RowError(line, form.errors)
+
+  values = {}
+  for column in columns:
+    value = form.data[column] if column in form.data else row.get(column)
+    if column in LIST_COLUMNS:
+      value = list(value or [])
+    values[column] = value
+  if model is Show:
+    for column in ('venue_id', 'artist_id'):
+      try:
+        values[column] = int(values[column])
+      except (TypeError, ValueError):
+        raise RowError(line, {column: ['Not a valid integer value.']})
+  if row.get('id') not in (None, ''):
+    values['id'] = int(row['id'])
+  return values
+
+
+def _take_unowned(batch):
+  # removes the show rows whose venue or artist doesn't exist from batch, a
+  # list of (line, values), and returns their RowErrors; SQLite doesn't
+  # enforce the foreign keys, so they are checked here, one query per table
+  venues = scheduling._existing(Venue, {values['venue_id'] for _, values in batch})
+  artists = scheduling._existing(Artist, {values['artist_id'] for _, values in batch})
+  kept = []
+  errors = []
+  for line, values in batch:
+    row_errors = {}
+    if values['venue_id'] not in venues:
+      row_errors['venue_id'] = ['Venue does not exist.']
+    if values['artist_id'] not in artists:
+      row_errors['artist_id'] = ['Artist does not exist.']
+    if row_errors:
+      errors.append(RowError(line, row_errors))
+    else:
+      kept.append((line, values))
+  batch[:] = kept
+  return errors
+
+#----------------------------------------------------------------------------#
+# Writing.
+#----------------------------------------------------------------------------#
+
+def _pg_array(values):
+  return '{' + ','.join(
+    '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values
+  ) + '}'
+
+
+def _copy(model, rows):
+  # PostgreSQL COPY ... FROM STDIN over the session's connection
+  columns = list(rows[0].keys())
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  for row in rows:
+    writer.writerow([
+      _pg_array(row[c]) if c in LIST_COLUMNS
+      else '' if row[c] is None
+      else row[c].isoformat() if isinstance(row[c], (datetime, date))
+      else row[c]
+      for c in columns
+    ])
+  buffer.seek(0)
+  cursor = db.session.connection().connection.cursor()
+  cursor.copy_expert(
+    'COPY "%s" (%s) FROM STDIN WITH (FORMAT csv)'
+    % (model.__tablename__, ', '.join('"%s"' % c for c in columns)),
+    buffer
+  )
+
+
+def write_batch(model, rows):
+  # rows must share the same keys
+  if db.session.get_bind().dialect.name == 'postgresql':
+    _copy(model, rows)
+  else:
+    db.session.execute(model.__table__.insert(), rows)
+
+
+def _bump_sequence(model):
+  # rows imported with explicit ids leave the serial sequence behind
+  if db.session.get_bind().dialect.name == 'postgresql':
+    db.session.execute(text(
+      "SELECT setval(pg_get_serial_sequence('\"%s\"', 'id'), COALESCE(MAX(id), 1)) FROM \"%s\""
+      % (model.__tablename__, model.__tablename__)
+    ))
+    db.session.commit()
+
+#----------------------------------------------------------------------------#
+# Import / export.
+#----------------------------------------------------------------------------#
+
+def _read_checkpoint(path):
+  try:
+    with open(path) as f:
+      return int(f.read().strip() or 0)
+  except FileNotFoundError:
+    return 0
+
+
+def _write_checkpoint(path, line):
+  with open(path, 'w') as f:
+    f.write(str(line))
+
+
+def import_file(entity, path, fmt=None, batch_size=5000, resume=False, report=print):
+  # Returns (rows imported, list of RowError). With resume, input up to the
+  # line recorded in <path>.checkpoint is skipped.
+  model = ENTITIES[entity][0]
+  checkpoint = path + '.checkpoint'
+  done = _read_checkpoint(checkpoint) if resume else 0
+  imported = 0
+  errors = []
+  batch = []
+
+  def flush():
+    nonlocal imported
+    if not batch:
+      return
+    last_line = batch[-1][0]
+    if model is Show:
+      for error in _take_unowned(batch):
+        errors.append(error)
+        report(str(error))
+    if not batch:
+      _write_checkpoint(checkpoint, last_line)
+      return
+    lines, rows = zip(*batch)
+    try:
+      write_batch(model, list(rows))
+      db.session.commit()
+      imported += len(rows)
+    except Exception as e:
+      db.session.rollback()
+      report('batch ending at line %d failed (%s), retrying row by row' % (lines[-1], e))
+      for line, row in batch:
+        try:
+          with db.session.begin_nested():
+            db.session.execute(model.__table__.insert(), [row])
+          imported += 1
+        except Exception as row_error:
+          errors.append(RowError(line, str(getattr(row_error, 'orig', row_error))))
+          report(str(errors[-1]))
+      db.session.commit()
+    _write_checkpoint(checkpoint, last_line)
+    batch.clear()
+
+  with open(path, newline='') as stream:
+    for line, row in read_rows(stream, _detect_format(path, fmt)):
+      if line <= done:
+        continue
+      try:
+        values = validate(entity, line, row)
+      except RowError as e:
+        errors.append(e)
+        report(str(e))
+        continue
+      if batch and batch[0][1].keys() != values.keys():
+        flush()
+      batch.append((line, values))
+      if len(batch) >= batch_size:
+        flush()
+    flush()
+
+  _bump_sequence(model)
+  if model is Show:
+    counters.count_uncounted()
+    db.session.commit()
+  else:
+    # repairs the sqlite name index after a large load, off the import's clock
+    jobs.enqueue('reindex', entity=entity)
+    db.session.commit()
+  if os.path.exists(checkpoint):
+    os.remove(checkpoint)
+  return imported, errors
+
+
+def export_rows(entity):
+  model, _, columns = ENTITIES[entity]
+  fields = [model.id] + [getattr(model, c) for c in columns]
+  query = db.session.query(*fields).order_by(model.id)
+  return ['id'] + list(columns), query.yield_per(5000)
+
+
+def export_file(entity, stream, fmt='csv'):
+  header, rows = export_rows(entity)
+  if fmt == 'ndjson':
+    for row in rows:
+      stream.write(json.dumps(
+        dict(zip(header, row)),
+        default=lambda v: v.isoformat() if isinstance(v, (datetime, date)) else str(v)
+      ) + '\n')
+    return
+  writer = csv.writer(stream)
+  writer.writerow(header)
+  for row in rows:
+    writer.writerow([
+      LIST_SEPARATOR.join(value or []) if column in LIST_COLUMNS
+      else value.isoformat() if isinstance(value, (datetime, date))
+      else value
+      for column, value in zip(header, row)
+    ])
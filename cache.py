@@ -0,0 +1,203 @@
+#----------------------------------------------------------------------------#
+# Read-through cache with pluggable backends.
+#
+# The in-process LRU backend is the default. The Redis backend takes any
+# client exposing get/set(ex=)/delete, so a local fake can stand in for a
+# real server. Misses are single-flight: concurrent builds of one key in a
+# process collapse into one.
+#----------------------------------------------------------------------------#
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUBackend:
+  # bounded in-process store; entries expire after their own timeout and the
+  # least recently used entry is evicted once max_entries is reached
+
+  def __init__(self, max_entries=1024):
+    self.max_entries = max_entries
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      value, expires_at = entry
+      if expires_at is not None and expires_at <= time.monotonic():
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return value
+
+  def set(self, key, value, timeout=None):
+    expires_at = time.monotonic() + timeout if timeout else None
+    with self._lock:
+      self._entries[key] = (value, expires_at)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def delete(self, *keys):
+    with self._lock:
+      for key in keys:
+        self._entries.pop(key, None)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+
+class RedisBackend:
+
+  def __init__(self, client, prefix='fyyur:'):
+    self.client = client
+    self.prefix = prefix
+
+  def get(self, key):
+    data = self.client.get(self.prefix + key)
+    return None if data is None else pickle.loads(data)
+
+  def set(self, key, value, timeout=None):
+    self.client.set(self.prefix + key, pickle.dumps(value), ex=int(timeout) if timeout else None)
+
+  def delete(self, *keys):
+    if keys:
+      self.client.delete(*[self.prefix + key for key in keys])
+
+  def clear(self):
+    for key in self.client.scan_iter(self.prefix + '*'):
+      self.client.delete(key)
+
+
+class NullBackend:
+
+  def get(self, key):
+    return None
+
+  def set(self, key, value, timeout=None):
+    pass
+
+  def delete(self, *keys):
+    pass
+
+  def clear(self):
+    pass
+
+
+class _Call:
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.result = None
+    self.error = None
+
+
+class SingleFlight:
+  # concurrent do() calls with the same key share one call of fn: the first
+  # caller runs it, the others wait for its result (or its exception)
+
+  def __init__(self):
+    self._calls = {}
+    self._lock = threading.Lock()
+    self.coalesced = 0
+
+  def do(self, key, fn):
+    with self._lock:
+      call = self._calls.get(key)
+      leader = call is None
+      if leader:
+        call = self._calls[key] = _Call()
+      else:
+        self.coalesced += 1
+    if not leader:
+      call.done.wait()
+      if call.error is not None:
+        raise call.error
+      return call.result
+    try:
+      call.result = fn()
+    except BaseException as e:
+      call.error = e
+      raise
+    finally:
+      with self._lock:
+        del self._calls[key]
+      call.done.set()
+    return call.result
+
+
+class Cache:
+  # CACHE_BACKEND selects 'lru' (default), 'redis' or 'null'; 'redis' needs
+  # CACHE_REDIS_URL and the redis package unless a client is passed in.
+
+  def __init__(self, app=None, backend=None):
+    self.backend = backend or NullBackend()
+    self.default_timeout = 300
+    self.hits = 0
+    self.misses = 0
+    self._lock = threading.Lock()
+    self._flights = SingleFlight()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app, client=None):
+    self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+    kind = app.config.get('CACHE_BACKEND', 'lru')
+    if kind == 'lru':
+      self.backend = LRUBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+    elif kind == 'redis':
+      if client is None:
+        import redis
+        client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+      self.backend = RedisBackend(client, app.config.get('CACHE_KEY_PREFIX', 'fyyur:'))
+    elif kind == 'null':
+      self.backend = NullBackend()
+    else:
+      raise ValueError('Unknown CACHE_BACKEND %r' % kind)
+    app.extensions['cache'] = self
+
+  def get(self, key):
+    value = self.backend.get(key)
+    with self._lock:
+      if value is None:
+        self.misses += 1
+      else:
+        self.hits += 1
+    return value
+
+  def set(self, key, value, timeout=None):
+    timeout = self.default_timeout if timeout is None else timeout
+    if timeout > 0:
+      self.backend.set(key, value, timeout)
+
+  def delete(self, *keys):
+    self.backend.delete(*keys)
+
+  def clear(self):
+    self.backend.clear()
+
+  def get_or_build(self, key, build, valid=None):
+    # build() returns (value, timeout); a None value is never cached and a
+    # timeout of None means the default timeout. A cached value for which
+    # valid(value) is false is rebuilt. Concurrent misses on the same key in
+    # this process wait for one build() and share its value.
+    value = self.get(key)
+    if value is not None and valid is not None and not valid(value):
+      value = None
+    if value is None:
+      value = self._flights.do(key, lambda: self._build(key, build))
+    return value
+
+  def _build(self, key, build):
+    value, timeout = build()
+    if value is not None:
+      self.set(key, value, timeout)
+    return value
+
+  def stats(self):
+    with self._lock:
+      return {'hits': self.hits, 'misses': self.misses, 'coalesced': self._flights.coalesced}
@@ -0,0 +1,99 @@
+#----------------------------------------------------------------------------#
+# `flask fyyur ...` maintenance commands.
+#----------------------------------------------------------------------------#
+import sys
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+import bulk
+import counters
+import feed
+import seed
+
+fyyur = AppGroup('fyyur', help='Fyyur data maintenance commands.')
+
+ENTITY = click.Choice(sorted(bulk.ENTITIES))
+FORMAT = click.Choice(['csv', 'ndjson'])
+
+
+@fyyur.command('import')
+@click.argument('entity', type=ENTITY)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=FORMAT, help='Defaults from the file extension.')
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option('--resume', is_flag=True, help='Skip input already committed by an earlier run.')
+def import_command(entity, path, fmt, batch_size, resume):
+  """Load venues, artists or shows from a CSV/NDJSON file."""
+  report = lambda message: click.echo(message, err=True)
+  # the create forms expect a request context
+  with current_app.test_request_context():
+    imported, errors = bulk.import_file(entity, path, fmt=fmt, batch_size=batch_size,
+                                        resume=resume, report=report)
+  click.echo('%d %s rows imported, %d rejected' % (imported, entity, len(errors)))
+  if errors:
+    sys.exit(1)
+
+
+@fyyur.command('export')
+@click.argument('entity', type=ENTITY)
+@click.option('--format', 'fmt', type=FORMAT, default='csv', show_default=True)
+@click.option('--output', '-o', type=click.File('w'), default='-')
+def export_command(entity, fmt, output):
+  """Write every venue, artist or show as CSV/NDJSON."""
+  bulk.export_file(entity, output, fmt)
+
+
+@fyyur.command('roll-shows')
+def roll_shows_command():
+  """Move shows that have started from the upcoming to the past counters."""
+  click.echo('%d shows moved to past' % counters.roll_shows())
+  click.echo('%d shows pruned from the upcoming feed' % feed.prune())
+
+
+@fyyur.command('check-counters')
+@click.option('--fix', is_flag=True, help='Rebuild every counter from Show.')
+def check_counters_command(fix):
+  """Compare the venue/artist show counters with the Show table."""
+  mismatches = counters.check()
+  for table, id, stored, actual in mismatches:
+    click.echo('%s %s: stored upcoming/past %s/%s, actual %s/%s' % ((table, id) + stored + actual))
+  click.echo('%d mismatched rows' % len(mismatches))
+  if fix:
+    counters.rebuild()
+    click.echo('counters rebuilt')
+  elif mismatches:
+    sys.exit(1)
+
+
+@fyyur.command('seed')
+@click.option('--shows', default=10000, show_default=True)
+@click.option('--venues', type=int, help='Defaults to one venue per 50 shows.')
+@click.option('--artists', type=int, help='Defaults to one artist per 20 shows.')
+@click.option('--seed', 'random_seed', default=42, show_default=True)
+@click.option('--batch-size', default=10000, show_default=True)
+def seed_command(shows, venues, artists, random_seed, batch_size):
+  """Append synthetic venues, artists and shows to the database."""
+  venues = max(shows // 50, 1) if venues is None else venues
+  artists = max(shows // 20, 1) if artists is None else artists
+  seed.generate(venues, artists, shows, seed=random_seed, batch_size=batch_size,
+                report=lambda message: click.echo(message, err=True))
+
+
+@fyyur.command('run-jobs')
+@click.option('--once', is_flag=True, help='Exit once no job is due.')
+def run_jobs_command(once):
+  """Run background jobs from the Job outbox on this process."""
+  queue = current_app.extensions['jobs']
+  while True:
+    ran = queue.run_pending()
+    if once:
+      click.echo('%d jobs run' % ran)
+      return
+    time.sleep(current_app.config['JOBS_POLL_INTERVAL'])
+
+
+@fyyur.command('rebuild-feed')
+def rebuild_feed_command():
+  """Refill the upcoming-shows feed table from Show, Venue and Artist."""
+  click.echo('%d upcoming shows in the feed' % feed.rebuild())
@@ -7,8 +7,111 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 DEBUG = True
 
 # Connect to the database
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur')
 
+# Optional read replica; read-only pages are routed to it (see database.py)
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
 
-# TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/fyyur'
+# Engine and connection pool tuning, applied to the primary and the replica
+SQLALCHEMY_ENGINE_OPTIONS = {
+  # check connections on checkout so a database restart doesn't fail requests
+  'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+  # recycle connections before server/proxy idle timeouts close them
+  'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+}
+if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+  SQLALCHEMY_ENGINE_OPTIONS.update({
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+  })
+# Milliseconds after which PostgreSQL cancels a statement (0 disables)
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))
+if DB_STATEMENT_TIMEOUT and SQLALCHEMY_DATABASE_URI.startswith('postgres'):
+  SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {
+    'options': '-c statement_timeout=%d' % DB_STATEMENT_TIMEOUT
+  }
 
+# Most past and upcoming shows listed on a venue or artist page (None for all)
+DETAIL_SHOWS_LIMIT = 50
+
+# Locales the datetime filter formats in, picked per request from Accept-Language
+LANGUAGES = ['en']
+BABEL_DEFAULT_LOCALE = 'en'
+
+# Rows per page on the keyset-paginated /artists and /shows listings
+LISTING_PER_PAGE = 50
+
+
+# Cache for the venue and artist detail pages: 'lru' (in-process, default),
+# 'redis' (shared, needs CACHE_REDIS_URL) or 'null' to disable
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'lru')
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+
+# Rows fetched per round trip by the streaming /api/v1 listings
+API_YIELD_PER = 1000
+
+# Per-request SQL profiling (Server-Timing header, /_metrics, request log).
+# A statement repeated more than SQL_N_PLUS_ONE_THRESHOLD times in one
+# request is logged as a probable N+1.
+SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', '1') == '1'
+SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 10))
+SQL_PROFILER_SLOWEST = 3
+
+# Run independent page queries concurrently on an async engine (see aio.py);
+# needs asyncpg (aiosqlite on SQLite). ASYNC_DATABASE_URI defaults to the replica or primary URL
+# with the async driver swapped in.
+ASYNC_QUERIES = os.environ.get('ASYNC_QUERIES', '0') == '1'
+ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URI')
+# Connections per process of the async engine, on top of the primary pool
+# above: a process may hold DB_POOL_SIZE + DB_MAX_OVERFLOW + ASYNC_POOL_SIZE
+# + ASYNC_MAX_OVERFLOW connections when ASYNC_QUERIES is on
+ASYNC_POOL_SIZE = int(os.environ.get('ASYNC_POOL_SIZE', 4))
+ASYNC_MAX_OVERFLOW = int(os.environ.get('ASYNC_MAX_OVERFLOW', 0))
+
+# Production server (gunicorn.conf.py)
+WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+
+# Seconds browsers and shared caches may reuse a read page before revalidating
+HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 60))
+
+# Total size of rendered list-page fragments kept in memory (see fragments.py)
+FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Seconds a faceted browse result (/api/v1/<venues|artists>/browse) is cached
+FACET_CACHE_TIMEOUT = int(os.environ.get('FACET_CACHE_TIMEOUT', 60))
+
+# Most shows accepted by one POST /api/v1/shows/schedule request
+SCHEDULE_MAX_SHOWS = int(os.environ.get('SCHEDULE_MAX_SHOWS', 5000))
+
+# Flask-SQLAlchemy's per-object change tracking; nothing listens to it
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Background jobs (jobs.py): pool threads per web process (0: only enqueue, and
+# run `flask fyyur run-jobs` separately), seconds between outbox polls,
+# seconds a claimed job is leased for, and attempts before a job is failed
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 5))
+JOBS_LEASE = int(os.environ.get('JOBS_LEASE', 300))
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+
+# Timeout of the check_image job's request to an image_link
+IMAGE_CHECK_TIMEOUT = float(os.environ.get('IMAGE_CHECK_TIMEOUT', 5))
+
+# Per-client rate limiting (ratelimit.py): 'memory' keeps buckets per process,
+# 'redis' shares them between processes through RATE_LIMIT_REDIS_URL
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/1')
+
+# Search requests per second per client, and the burst allowed above that rate
+SEARCH_RATE = float(os.environ.get('SEARCH_RATE', 2))
+SEARCH_BURST = int(os.environ.get('SEARCH_BURST', 20))
+
+# Seconds a search result is shared between identical searches
+SEARCH_CACHE_TIMEOUT = int(os.environ.get('SEARCH_CACHE_TIMEOUT', 10))
@@ -0,0 +1,136 @@
+#----------------------------------------------------------------------------#
+# Denormalized upcoming/past show counters on Venue and Artist.
+#
+# Show.counted_as_upcoming records which side of the counters a show has
+# been added to: NULL (not counted yet), true (upcoming) or false (past).
+# Writes adjust the counters as they go, roll_shows() moves shows whose
+# start_time has passed from upcoming to past, and rebuild() recomputes
+# everything from Show when check() finds drift.
+#
+# Between rolls, shows that have just started are still counted as
+# upcoming; run `flask fyyur roll-shows` as often as that matters.
+#----------------------------------------------------------------------------#
+from datetime import datetime
+from sqlalchemy import bindparam, case, func, select
+from models import db, Venue, Artist, Show
+
+OWNERS = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+
+def _adjust(model, deltas):
+  # deltas: [{'_id': id, '_upcoming': n, '_past': n}], applied in one executemany
+  if not deltas:
+    return
+  table = model.__table__
+  db.session.execute(
+    table.update()
+      .where(table.c.id == bindparam('_id'))
+      .values(upcoming_shows_count=table.c.upcoming_shows_count + bindparam('_upcoming'),
+              past_shows_count=table.c.past_shows_count + bindparam('_past')),
+    deltas
+  )
+
+
+def _grouped(fk_column, criteria, upcoming, past):
+  # per-owner counts of the shows matching criteria on each side
+  return db.session.query(
+      fk_column.label('id'),
+      func.sum(case((upcoming, 1), else_=0)).label('upcoming'),
+      func.sum(case((past, 1), else_=0)).label('past')
+    ).filter(*criteria).group_by(fk_column).all()
+
+
+def count_rows(rows, now=None):
+  # adds shows about to be inserted as dicts (venue_id, artist_id, start_time)
+  # to the counters, one executemany per table, and sets each row's
+  # counted_as_upcoming to match
+  now = now or datetime.now()
+  totals = {Venue: {}, Artist: {}}
+  for row in rows:
+    row['counted_as_upcoming'] = row['start_time'] > now
+    side = 0 if row['counted_as_upcoming'] else 1
+    for model, key in ((Venue, 'venue_id'), (Artist, 'artist_id')):
+      counts = totals[model].setdefault(int(row[key]), [0, 0])
+      counts[side] += 1
+  for model, by_id in totals.items():
+    # ascending ids so concurrent batches lock rows in the same order
+    _adjust(model, [{'_id': id, '_upcoming': by_id[id][0], '_past': by_id[id][1]}
+                    for id in sorted(by_id)])
+
+
+def count_uncounted(now=None):
+  # counts every show inserted without count_rows(), e.g. by a bulk import
+  now = now or datetime.now()
+  criteria = (Show.counted_as_upcoming.is_(None),)
+  for model, fk_column in OWNERS:
+    rows = _grouped(fk_column, criteria, Show.start_time > now, Show.start_time <= now)
+    _adjust(model, [{'_id': r.id, '_upcoming': r.upcoming, '_past': r.past} for r in rows])
+  db.session.query(Show).filter(*criteria) \
+    .update({Show.counted_as_upcoming: Show.start_time > now}, synchronize_session=False)
+
+
+def roll_shows(now=None):
+  # moves shows that have started since the last roll from upcoming to past;
+  # returns how many moved
+  now = now or datetime.now()
+  criteria = (Show.counted_as_upcoming.is_(True), Show.start_time <= now)
+  for model, fk_column in OWNERS:
+    rows = _grouped(fk_column, criteria, Show.start_time <= now, Show.start_time > now)
+    _adjust(model, [{'_id': r.id, '_upcoming': -r.upcoming, '_past': r.upcoming} for r in rows])
+  moved = db.session.query(Show).filter(*criteria) \
+    .update({Show.counted_as_upcoming: False}, synchronize_session=False)
+  db.session.commit()
+  return moved
+
+
+def _actual(model, fk_column):
+  # correlated subqueries counting each row's shows from scratch, by the side
+  # each show is recorded on
+  upcoming = select(func.count(Show.id)) \
+    .where(fk_column == model.id, Show.counted_as_upcoming.is_(True)).scalar_subquery()
+  past = select(func.count(Show.id)) \
+    .where(fk_column == model.id, Show.counted_as_upcoming.is_(False)).scalar_subquery()
+  return upcoming, past
+
+
+def check():
+  # returns [(table, id, stored (upcoming, past), actual (upcoming, past))]
+  # for every row whose counters disagree with its shows
+  mismatches = []
+  for model, fk_column in OWNERS:
+    upcoming, past = _actual(model, fk_column)
+    rows = db.session.query(model.id, model.upcoming_shows_count, model.past_shows_count,
+                            upcoming.label('upcoming'), past.label('past')) \
+      .filter((model.upcoming_shows_count != upcoming) | (model.past_shows_count != past)) \
+      .all()
+    mismatches.extend(
+      (model.__tablename__, r.id, (r.upcoming_shows_count, r.past_shows_count), (r.upcoming, r.past))
+      for r in rows
+    )
+  return mismatches
+
+
+def recount(model, ids):
+  # recomputes the counters of the given venues or artists from Show, by the
+  # side each show is recorded on
+  if not ids:
+    return
+  upcoming, past = _actual(model, dict(OWNERS)[model])
+  db.session.query(model).filter(model.id.in_(list(ids))) \
+    .update({model.upcoming_shows_count: upcoming, model.past_shows_count: past},
+            synchronize_session=False)
+
+
+def rebuild(now=None, session=None):
+  # recomputes every counter, and which side each show is on, from Show;
+  # a migration passes a session on its own connection
+  now = now or datetime.now()
+  session = session or db.session
+  session.query(Show).update({Show.counted_as_upcoming: Show.start_time > now},
+                             synchronize_session=False)
+  for model, fk_column in OWNERS:
+    upcoming, past = _actual(model, fk_column)
+    session.query(model).update({model.upcoming_shows_count: upcoming,
+                                 model.past_shows_count: past},
+                                synchronize_session=False)
+  session.commit()
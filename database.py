@@ -0,0 +1,37 @@
+#----------------------------------------------------------------------------#
+# Session routing between the primary database and a read replica.
+#----------------------------------------------------------------------------#
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(SignallingSession):
+  # Statements from views marked @read_only go to the 'replica' bind when one
+  # is configured; flushes, explicit binds and everything else use the
+  # primary, so a read-only view that ends up writing still writes to the
+  # primary.
+
+  def get_bind(self, mapper=None, clause=None, **kwargs):
+    if (has_app_context() and g.get('read_replica') and not self._flushing
+        and REPLICA_BIND in self.app.config.get('SQLALCHEMY_BINDS', {})):
+      return self.db.get_engine(self.app, bind=REPLICA_BIND)
+    return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+  def create_session(self, options):
+    return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def read_only(view):
+  # marks a view whose queries may be served by the read replica
+  @wraps(view)
+  def wrapper(*args, **kwargs):
+    g.read_replica = True
+    return view(*args, **kwargs)
+  return wrapper
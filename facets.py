@@ -0,0 +1,84 @@
+#----------------------------------------------------------------------------#
+# Faceted browse of venues and artists by genre and area.
+#
+# Filters: every requested genre must be in the row's genres array (ARRAY
+# @>, served by the GIN index on genres) plus optional city/state. Facet
+# counts for genres and areas over the filtered rows come back from one
+# grouped UNION ALL statement. On SQLite, where genres is a JSON array
+# (models.GENRES), json_each() stands in for @> and unnest().
+#----------------------------------------------------------------------------#
+from sqlalchemy import func, literal, null, select, union_all
+from models import db
+from pagination import keyset_page
+
+
+def _json_genres():
+  return db.session.get_bind().dialect.name == 'sqlite'
+
+
+def _each_genre(model):
+  # the elements of model.genres as a table with a single 'value' column
+  return func.json_each(model.genres).table_valued('value')
+
+
+def _filters(model, genres, city, state):
+  criteria = []
+  if genres and _json_genres():
+    for genre in sorted(genres):
+      each = _each_genre(model)
+      criteria.append(select(each.c.value).where(each.c.value == genre).exists())
+  elif genres:
+    criteria.append(model.genres.contains(sorted(genres)))
+  if city:
+    criteria.append(model.city == city)
+  if state:
+    criteria.append(model.state == state)
+  return criteria
+
+
+def facet_counts(model, genres=(), city=None, state=None):
+  criteria = _filters(model, genres, city, state)
+  if _json_genres():
+    each = _each_genre(model)
+    genre_values = select(each.c.value.label('genre')).select_from(model.__table__, each) \
+      .where(*criteria).subquery()
+  else:
+    genre_values = select(func.unnest(model.genres).label('genre')).where(*criteria).subquery()
+  by_genre = select(
+      literal('genre').label('facet'),
+      genre_values.c.genre.label('value'),
+      null().label('state'),
+      func.count().label('count')
+    ).group_by(genre_values.c.genre)
+  by_area = select(
+      literal('area').label('facet'),
+      model.city.label('value'),
+      model.state.label('state'),
+      func.count().label('count')
+    ).where(*criteria).group_by(model.city, model.state)
+
+  facets = {'genres': [], 'areas': []}
+  for row in db.session.execute(union_all(by_genre, by_area)):
+    if row.facet == 'genre':
+      facets['genres'].append({'genre': row.value, 'count': row.count})
+    else:
+      facets['areas'].append({'city': row.value, 'state': row.state, 'count': row.count})
+  facets['genres'].sort(key=lambda f: (-f['count'], f['genre']))
+  facets['areas'].sort(key=lambda f: (-f['count'], f['state'] or '', f['city'] or ''))
+  return facets
+
+
+def browse(model, genres=(), city=None, state=None, after=None, per_page=50):
+  # one keyset page of matching rows, ordered by (name, id), and the facets
+  query = db.session.query(
+      model.id, model.name, model.city, model.state, model.genres,
+      model.upcoming_shows_count.label('num_upcoming_shows')
+    ).filter(*_filters(model, genres, city, state))
+  rows, next_after = keyset_page(query, (model.name, model.id), (str, int),
+                                 after=after, per_page=per_page)
+  return {
+    'filters': {'genres': sorted(genres), 'city': city, 'state': state},
+    'data': [dict(row._mapping) for row in rows],
+    'next_after': next_after,
+    'facets': facet_counts(model, genres, city, state),
+  }
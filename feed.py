@@ -0,0 +1,103 @@
+#----------------------------------------------------------------------------#
+# Upcoming-shows feed.
+#
+# UpcomingShow holds one row per show that hasn't started, with the venue's
+# and artist's names denormalized onto it, so the feed reads one indexed
+# table instead of joining Show, Venue and Artist. Database triggers,
+# created by a migration (migrations/versions), keep it in step row by row:
+# inserting, moving or deleting a show adds or removes its row, and
+# renaming a venue or artist rewrites the rows that show it.
+# Shows that have started stay in the table, filtered out by the reads,
+# until prune() (run by `flask fyyur roll-shows`) deletes them; rebuild()
+# fills the table from scratch, e.g. for existing data.
+#----------------------------------------------------------------------------#
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, Venue, Artist, Show, UpcomingShow
+
+# query arguments that select the feed on /shows
+RANGE_ARGS = ('from', 'to', 'city', 'state')
+
+FEED_COLUMNS = ('show_id, start_time, venue_id, venue_name, venue_city, venue_state, '
+                'artist_id, artist_name, artist_image_link')
+
+#----------------------------------------------------------------------------#
+# Maintenance.
+#----------------------------------------------------------------------------#
+
+def rebuild(now=None):
+  # refills the feed from Show, Venue and Artist; returns the number of rows
+  now = now or datetime.now()
+  db.session.query(UpcomingShow).delete(synchronize_session=False)
+  rows = db.session.query(
+      Show.id, Show.start_time, Venue.id, Venue.name, Venue.city, Venue.state,
+      Artist.id, Artist.name, Artist.image_link
+    ).join(Venue, Show.venue_id == Venue.id) \
+    .join(Artist, Show.artist_id == Artist.id) \
+    .filter(Show.start_time > now)
+  columns = [c.strip() for c in FEED_COLUMNS.split(',')]
+  inserted = db.session.execute(
+    UpcomingShow.__table__.insert().from_select(columns, rows.statement)).rowcount
+  db.session.commit()
+  return inserted
+
+
+def prune(now=None):
+  # deletes the rows of shows that have started; returns how many
+  now = now or datetime.now()
+  pruned = db.session.query(UpcomingShow).filter(UpcomingShow.start_time <= now) \
+    .delete(synchronize_session=False)
+  db.session.commit()
+  return pruned
+
+#----------------------------------------------------------------------------#
+# Reads.
+#----------------------------------------------------------------------------#
+
+def _parse_datetime(value):
+  # ISO 8601; a value with an offset (or Z) is converted to naive local
+  # time, which start times are stored in
+  parsed = datetime.fromisoformat(value)
+  if parsed.tzinfo is not None:
+    parsed = parsed.astimezone().replace(tzinfo=None)
+  return parsed
+
+
+def parse_range(args):
+  # (start, end, city, state) from ?from=&to=&city=&state=; from defaults to
+  # now and is never earlier, to is exclusive and a bare date covers its whole
+  # day. Raises ValueError for a malformed date.
+  now = datetime.now()
+  start = args.get('from')
+  start = max(_parse_datetime(start), now) if start else now
+  end = args.get('to')
+  if end:
+    end_date = _parse_datetime(end)
+    end = end_date + timedelta(days=1) if len(end) == 10 else end_date
+  return start, end or None, args.get('city') or None, args.get('state') or None
+
+
+def upcoming_query(start, end=None, city=None, state=None):
+  # feed rows from start (inclusive) to end, with the SHOW_FIELDS columns
+  query = db.session.query(
+      UpcomingShow.show_id,
+      UpcomingShow.start_time,
+      UpcomingShow.venue_id,
+      UpcomingShow.venue_name,
+      UpcomingShow.artist_id,
+      UpcomingShow.artist_name,
+      UpcomingShow.artist_image_link
+    ).filter(UpcomingShow.start_time >= start)
+  if end is not None:
+    query = query.filter(UpcomingShow.start_time < end)
+  if city:
+    query = query.filter(UpcomingShow.venue_city == city)
+  if state:
+    query = query.filter(UpcomingShow.venue_state == state)
+  return query
+
+
+def next_start_time():
+  # when the soonest upcoming show starts, and so drops off the feed
+  return db.session.query(func.min(UpcomingShow.start_time)) \
+    .filter(UpcomingShow.start_time > datetime.now()).scalar()
@@ -0,0 +1,55 @@
+#----------------------------------------------------------------------------#
+# Jinja filters.
+#----------------------------------------------------------------------------#
+from datetime import date, datetime
+from functools import lru_cache
+from flask import current_app, g, has_request_context, request
+
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma",
+}
+# babel's named formats: the locale's date and time patterns joined by its
+# datetime pattern, which babel.dates.format_datetime assembles
+BABEL_FORMATS = ('full', 'long', 'medium', 'short')
+
+
+@lru_cache(maxsize=64)
+def _compiled(format, locale):
+  # babel pattern and locale data, parsed once per (format, locale); babel is
+  # imported here, on first use, to keep it out of app startup
+  from babel import Locale
+  from babel.dates import parse_pattern
+  return parse_pattern(DATETIME_FORMATS.get(format, format)), Locale.parse(locale)
+
+
+@lru_cache(maxsize=4096)
+def _format(value, format, locale):
+  if format not in DATETIME_FORMATS and format in BABEL_FORMATS:
+    from babel.dates import format_datetime as babel_format_datetime
+    return babel_format_datetime(value, format, locale=locale)
+  pattern, babel_locale = _compiled(format, locale)
+  return pattern.apply(value, babel_locale)
+
+
+def request_locale():
+  # g.locale when a view set one, else the best Accept-Language match
+  default = current_app.config.get('BABEL_DEFAULT_LOCALE', 'en')
+  if not has_request_context():
+    return default
+  if 'locale' not in g:
+    g.locale = request.accept_languages.best_match(
+      current_app.config.get('LANGUAGES', [default])) or default
+  return g.locale
+
+
+def format_datetime(value, format='medium', locale=None):
+  # value is normally a datetime; strings are still parsed for old callers
+  if value is None or value == '':
+    return ''
+  if isinstance(value, str):
+    import dateutil.parser
+    value = dateutil.parser.parse(value)
+  elif isinstance(value, date) and not isinstance(value, datetime):
+    value = datetime(value.year, value.month, value.day)
+  return _format(value, format, locale or request_locale())
@@ -0,0 +1,115 @@
+#----------------------------------------------------------------------------#
+# Rendered-fragment cache for the list pages.
+#
+# Each venue card, artist row and show row is rendered once per
+# (key, version, locale) and reused until its version changes. Pages call the
+# venue_card/artist_row/show_row template globals inside their loops, so a
+# page is assembled from cached fragments. The store is an LRU bounded by the
+# total size of the cached markup; fragments are also tagged with the
+# entities they show so write handlers can drop them at once.
+#----------------------------------------------------------------------------#
+import threading
+from collections import OrderedDict, defaultdict
+from flask import render_template
+from markupsafe import Markup
+from filters import request_locale
+
+
+def _get(obj, name, default=None):
+  # list pages pass dicts or result rows
+  if isinstance(obj, dict):
+    return obj.get(name, default)
+  return getattr(obj, name, default)
+
+
+class FragmentCache:
+
+  def __init__(self, app=None):
+    self.max_bytes = 0
+    self._entries = OrderedDict()
+    self._tags = defaultdict(set)
+    self._size = 0
+    self._lock = threading.Lock()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    app.jinja_env.globals.update(
+      cached_fragment=self.render,
+      venue_card=self.venue_card,
+      artist_row=self.artist_row,
+      show_row=self.show_row,
+    )
+    app.extensions['fragments'] = self
+
+  # store ----------------------------------------------------------------------
+
+  def _get_entry(self, key):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        self._entries.move_to_end(key)
+      return entry
+
+  def _set_entry(self, key, markup, tags):
+    size = len(markup)
+    if size > self.max_bytes:
+      return
+    with self._lock:
+      if key in self._entries:
+        self._remove(key)
+      self._entries[key] = (markup, tags)
+      self._size += size
+      for tag in tags:
+        self._tags[tag].add(key)
+      while self._size > self.max_bytes:
+        self._remove(next(iter(self._entries)))
+
+  def _remove(self, key):
+    markup, tags = self._entries.pop(key)
+    self._size -= len(markup)
+    for tag in tags:
+      keys = self._tags.get(tag)
+      if keys is not None:
+        keys.discard(key)
+        if not keys:
+          del self._tags[tag]
+
+  def invalidate(self, *tags):
+    # drops every fragment tagged with one of tags, e.g. 'venue:3'
+    with self._lock:
+      for tag in tags:
+        for key in list(self._tags.get(tag, ())):
+          self._remove(key)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._tags.clear()
+      self._size = 0
+
+  # rendering ------------------------------------------------------------------
+
+  def render(self, template, key, version, tags=(), **context):
+    # renders template with context once per (key, version, locale)
+    cache_key = (template, key, version, request_locale())
+    entry = self._get_entry(cache_key)
+    if entry is not None:
+      return entry[0]
+    markup = Markup(render_template(template, **context))
+    self._set_entry(cache_key, markup, frozenset((key,) + tuple(tags)))
+    return markup
+
+  def venue_card(self, venue):
+    key = 'venue:%s' % _get(venue, 'id')
+    return self.render('fragments/venue_card.html', key, _get(venue, 'version'), venue=venue)
+
+  def artist_row(self, artist):
+    key = 'artist:%s' % _get(artist, 'id')
+    return self.render('fragments/artist_row.html', key, _get(artist, 'version'), artist=artist)
+
+  def show_row(self, show):
+    tags = ('venue:%s' % _get(show, 'venue_id'), 'artist:%s' % _get(show, 'artist_id'))
+    return self.render('fragments/show_row.html', 'show:%s' % _get(show, 'id'),
+                       _get(show, 'version'), tags, show=show)
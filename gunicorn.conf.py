@@ -0,0 +1,14 @@
+# Production server settings, read from config.py (and so the environment):
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Every module-level name here is read as a gunicorn setting, and `config`
+# is one: import the values, not the module.
+from config import WEB_BIND, WEB_THREADS, WEB_WORKERS
+
+bind = WEB_BIND
+workers = WEB_WORKERS
+worker_class = 'gthread'
+threads = WEB_THREADS
+# load the app in each worker, after fork, so engines and pools aren't shared
+preload_app = False
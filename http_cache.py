@@ -0,0 +1,183 @@
+#----------------------------------------------------------------------------#
+# Conditional GET for the read pages.
+#
+# Each page has a validator, one small query: the list pages read the
+# version counters of the tables they render, which triggers bump on every
+# write, deletes included; a detail page aggregates the updated_at columns
+# and show counts of its entity, its shows and the other side of each.
+# The validator runs before the page's own queries and template; when the
+# client's If-None-Match or If-Modified-Since still matches, the view is
+# skipped and a 304 goes out. Every response carries a strong ETag,
+# Last-Modified and a public Cache-Control so a CDN or reverse proxy can
+# serve repeat traffic.
+#
+# Last-Modified has whole seconds while the validators' times don't: the
+# header carries the end of the second the page last changed in, and is
+# left out until that second is over, as a later write in the same second
+# would get the same date. If-Modified-Since is compared with the precise
+# time.
+#
+# A view that renders data built earlier, e.g. from the detail page cache,
+# records the validator version the data was built at with built_from();
+# it is part of the ETag, so a page served from stale data never shares an
+# ETag with the up-to-date page.
+#----------------------------------------------------------------------------#
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from sqlalchemy import func, literal_column
+from models import db, Venue, Artist, Show
+import feed
+
+
+def built_from(version):
+  # called by a view whose page is rendered from data built at an earlier
+  # validator version; the view runs with the current one in g.page_version
+  g.page_built = version
+
+
+def _etag(version, built):
+  return hashlib.sha1(repr((request.full_path, version, built)).encode()).hexdigest()
+
+
+def _http_date(last_modified):
+  # last_modified rounded up to the second, or None while that second is
+  # still going
+  date = last_modified.replace(microsecond=0)
+  if date < last_modified:
+    date += timedelta(seconds=1)
+  return date if date <= datetime.now(timezone.utc) else None
+
+
+def conditional(validator):
+  # validator(**view_args) returns (last_modified, version) for the page, or
+  # None when the page doesn't exist; version is anything with a stable repr
+  def decorator(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+      # flashed messages are per user and render once: never cache those pages
+      if session.get('_flashes'):
+        return view(*args, **kwargs)
+      state = validator(*args, **kwargs)
+      if state is None:
+        return view(*args, **kwargs)
+      last_modified, version = state
+      http_date = None
+      if last_modified is not None:
+        # timestamps are naive local time, like datetime.now() elsewhere
+        last_modified = last_modified.astimezone(timezone.utc)
+        http_date = _http_date(last_modified)
+      # the ETag of the page as rendered from current data
+      etag = _etag(version, version)
+
+      if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+      else:
+        since = request.if_modified_since
+        not_modified = since is not None and last_modified is not None and last_modified <= since
+      if not_modified:
+        response = current_app.response_class(status=304)
+      else:
+        g.page_version = version
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+          return response
+        etag = _etag(version, g.get('page_built', version))
+
+      response.set_etag(etag)
+      if http_date is not None:
+        response.last_modified = http_date
+      response.cache_control.public = True
+      response.cache_control.max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 60)
+      # dates are formatted in the request's locale
+      response.vary.add('Accept-Language')
+      return response
+    return wrapper
+  return decorator
+
+#----------------------------------------------------------------------------#
+# Validators.
+#----------------------------------------------------------------------------#
+
+# table name -> (version, when this process first saw it)
+_seen = {}
+
+
+def _version(model):
+  # the table's version counter as a scalar subquery: a sequence on
+  # PostgreSQL, a TableVersion row on SQLite; triggers bump it on every
+  # insert, update and delete (migrations/versions/58b16cffa763_table_versions.py)
+  name = model.__tablename__
+  if db.engine.dialect.name == 'postgresql':
+    return literal_column('(SELECT last_value FROM %s_version_seq)' % name.lower())
+  return literal_column('(SELECT version FROM "TableVersion" WHERE table_name = \'%s\')' % name)
+
+
+def _seen_at(model, version):
+  # counters carry no time: a version's Last-Modified is the first time this
+  # process read it, which is never before the write became visible
+  seen = _seen.get(model.__tablename__)
+  if seen is None or seen[0] != version:
+    seen = _seen[model.__tablename__] = (version, datetime.now())
+  return seen[1]
+
+
+def _table_state(*models):
+  # the tables' version counters, in one round trip; deletes move them too,
+  # so If-Modified-Since sees them
+  versions = tuple(db.session.query(*[_version(model) for model in models]).one())
+  last_modified = max(_seen_at(model, version) for model, version in zip(models, versions))
+  return last_modified, versions
+
+
+def venues_state():
+  return _table_state(Venue)
+
+
+def artists_state():
+  return _table_state(Artist)
+
+
+def shows_state():
+  last_modified, version = _table_state(Show, Venue, Artist)
+  if any(request.args.get(key) for key in feed.RANGE_ARGS):
+    # the upcoming-shows feed also changes when its soonest show starts
+    version += (feed.next_start_time(),)
+  return last_modified, version
+
+
+def _detail_state(model, entity_id, fk_column, other, other_fk):
+  # the entity's row, its shows and the other side of each show; the number
+  # of past shows moves whenever a show starts, which flips it from upcoming
+  # to past on the page. A deleted show only lowers the count, so the time
+  # the Show table's counter last moved goes into last_modified for
+  # If-Modified-Since.
+  now = datetime.now()
+  entity = db.session.query(model.updated_at).filter(model.id == entity_id).scalar_subquery()
+  row = db.session.query(
+      entity,
+      func.max(Show.updated_at),
+      func.max(other.updated_at),
+      func.count(Show.id),
+      func.count(Show.id).filter(Show.start_time <= now),
+      func.max(Show.start_time).filter(Show.start_time <= now),
+      _version(Show)
+    ).select_from(Show) \
+    .join(other, other_fk == other.id) \
+    .filter(fk_column == entity_id) \
+    .one()
+  if row[0] is None:
+    return None
+  shows_changed = _seen_at(Show, row[6])
+  last_modified = max(value for value in (row[0], row[1], row[2], row[5], shows_changed) if value is not None)
+  # the version leaves out the Show counter, which moves with any show anywhere
+  return last_modified, tuple(row[:6])
+
+
+def venue_state(venue_id):
+  return _detail_state(Venue, venue_id, Show.venue_id, Artist, Show.artist_id)
+
+
+def artist_state(artist_id):
+  return _detail_state(Artist, artist_id, Show.artist_id, Venue, Show.venue_id)
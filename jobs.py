@@ -0,0 +1,268 @@
+#----------------------------------------------------------------------------#
+# Background jobs for the side effects of writes.
+#
+# Write handlers enqueue() jobs on the request's session, so a job row in the
+# Job table (the outbox) is committed together with the write it belongs to,
+# or not at all. A dispatcher thread per process claims due rows and runs
+# them on a small thread pool; a claimed job's run_after is pushed out by
+# JOBS_LEASE seconds, so a job whose process died is picked up again once the
+# lease runs out, and pending jobs are picked up after a restart. Failed jobs
+# are retried with exponential backoff up to JOBS_MAX_ATTEMPTS, then kept
+# with failed set and the last error for inspection.
+#
+# JOBS_WORKERS=0 leaves the web processes enqueue-only; `flask fyyur
+# run-jobs` then runs the jobs in a process of its own.
+#----------------------------------------------------------------------------#
+import http.client
+import ipaddress
+import os
+import socket
+import threading
+import traceback
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from database import RoutingSession
+from models import db, Venue, Artist, Job
+import counters
+import search
+
+HANDLERS = {}
+MODELS = {'venue': Venue, 'artist': Artist}
+
+
+def handler(kind):
+  # registers fn(**payload) as the handler of jobs of this kind
+  def register(fn):
+    HANDLERS[kind] = fn
+    return fn
+  return register
+
+
+def enqueue(kind, **payload):
+  # adds a job to the current transaction; it runs once that commits.
+  # payload must be JSON serializable.
+  if kind not in HANDLERS:
+    raise KeyError('No job handler for %r' % kind)
+  db.session.add(Job(kind=kind, payload=payload))
+  db.session.info['jobs_enqueued'] = True
+
+
+class JobQueue:
+
+  def __init__(self, app=None):
+    self.app = None
+    self.workers = 0
+    self._pid = None
+    self._pool = None
+    self._idle = None
+    self._wake = threading.Event()
+    self._lock = threading.Lock()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    app.config.setdefault('JOBS_WORKERS', 2)
+    app.config.setdefault('JOBS_POLL_INTERVAL', 5)
+    app.config.setdefault('JOBS_LEASE', 300)
+    app.config.setdefault('JOBS_MAX_ATTEMPTS', 5)
+    self.app = app
+    self.workers = app.config['JOBS_WORKERS']
+    if self.workers and not event.contains(RoutingSession, 'after_commit', self._after_commit):
+      event.listen(RoutingSession, 'after_commit', self._after_commit)
+      app.before_request(self.start)
+    app.extensions['jobs'] = self
+
+  # dispatching ----------------------------------------------------------------
+
+  def start(self):
+    # The dispatcher and pool are started on first use in each process, so
+    # that pre-forking servers don't share them between workers.
+    if self._pid == os.getpid():
+      return
+    with self._lock:
+      if self._pid == os.getpid():
+        return
+      self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='jobs')
+      self._idle = threading.Semaphore(self.workers)
+      threading.Thread(target=self._dispatch, name='jobs-dispatcher', daemon=True).start()
+      self._pid = os.getpid()
+
+  def _after_commit(self, session):
+    if session.info.pop('jobs_enqueued', False):
+      self.start()
+      self._wake.set()
+
+  def _dispatch(self):
+    # Claims only as many jobs as there are idle workers: a claimed job's
+    # lease runs from the claim, so jobs must not wait in the pool's queue,
+    # where a backlog would outlast JOBS_LEASE and be claimed (and run) again.
+    interval = self.app.config['JOBS_POLL_INTERVAL']
+    while True:
+      self._idle.acquire()
+      idle = 1
+      while self._idle.acquire(blocking=False):
+        idle += 1
+      try:
+        with self.app.app_context():
+          ids = self.claim(idle)
+      except Exception:
+        self.app.logger.exception('job dispatcher failed')
+        ids = []
+      for id in ids:
+        future = self._pool.submit(self._run_in_context, id)
+        future.add_done_callback(lambda future: self._idle.release())
+      for _ in range(idle - len(ids)):
+        self._idle.release()
+      # go straight on while there is a backlog
+      if len(ids) < idle:
+        self._wake.wait(interval)
+        self._wake.clear()
+
+  def _run_in_context(self, id):
+    with self.app.app_context():
+      self.run(id)
+
+  # claiming and running ---------------------------------------------------------
+
+  def claim(self, limit):
+    # returns the ids of up to limit due jobs, now leased to this process
+    now = datetime.now()
+    lease = now + timedelta(seconds=current_app.config['JOBS_LEASE'])
+    due = db.session.query(Job.id) \
+      .filter(Job.failed.is_(False), Job.run_after <= now) \
+      .order_by(Job.run_after, Job.id) \
+      .limit(limit).all()
+    claimed = []
+    for id, in due:
+      # only one process can move run_after past now
+      updated = db.session.query(Job) \
+        .filter(Job.id == id, Job.failed.is_(False), Job.run_after <= now) \
+        .update({Job.run_after: lease, Job.attempts: Job.attempts + 1},
+                synchronize_session=False)
+      if updated:
+        claimed.append(id)
+    db.session.commit()
+    return claimed
+
+  def run(self, id):
+    # runs one claimed job; deletes it when done, reschedules it otherwise
+    job = db.session.get(Job, id)
+    if job is None:
+      return
+    kind, payload, attempts = job.kind, job.payload, job.attempts
+    try:
+      HANDLERS[kind](**payload)
+      db.session.query(Job).filter(Job.id == id).delete(synchronize_session=False)
+      db.session.commit()
+    except Exception:
+      db.session.rollback()
+      error = traceback.format_exc()
+      current_app.logger.warning('job %s (%s) failed, attempt %d: %s', id, kind, attempts, error)
+      values = {Job.last_error: error}
+      if attempts >= current_app.config['JOBS_MAX_ATTEMPTS']:
+        values[Job.failed] = True
+      else:
+        values[Job.run_after] = datetime.now() + timedelta(seconds=2 ** attempts)
+      db.session.query(Job).filter(Job.id == id).update(values, synchronize_session=False)
+      db.session.commit()
+
+  def run_pending(self, limit=100):
+    # runs due jobs on the calling thread until none are left; returns how
+    # many ran
+    total = 0
+    while True:
+      ids = self.claim(limit)
+      for id in ids:
+        self.run(id)
+      total += len(ids)
+      if not ids:
+        return total
+
+#----------------------------------------------------------------------------#
+# Handlers.
+#----------------------------------------------------------------------------#
+
+@handler('recount')
+def recount(venue_ids=(), artist_ids=()):
+  counters.recount(Venue, venue_ids)
+  counters.recount(Artist, artist_ids)
+  db.session.commit()
+
+
+# image_link is user input and the check runs from inside the network: the
+# request only goes to public addresses. The peer is checked once connected,
+# so a name that resolves differently on a second lookup, and every
+# redirect, go through the same check; proxies from the environment are
+# not used.
+
+class NonPublicAddress(OSError):
+  pass
+
+
+def _public_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+  sock = socket.create_connection(address, timeout, source_address)
+  peer = ipaddress.ip_address(sock.getpeername()[0])
+  if peer.version == 6 and peer.ipv4_mapped:
+    peer = peer.ipv4_mapped
+  if not peer.is_global:
+    sock.close()
+    raise NonPublicAddress('%s resolves to %s, not a public address' % (address[0], peer))
+  return sock
+
+
+class _PublicConnection:
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self._create_connection = _public_connection
+
+
+class _PublicHTTPConnection(_PublicConnection, http.client.HTTPConnection):
+  pass
+
+
+class _PublicHTTPSConnection(_PublicConnection, http.client.HTTPSConnection):
+  pass
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+  def http_open(self, req):
+    return self.do_open(_PublicHTTPConnection, req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+  def https_open(self, req):
+    return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+
+_image_opener = urllib.request.build_opener(
+  urllib.request.ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler)
+
+
+@handler('check_image')
+def check_image(entity, id):
+  # records whether the image_link of a venue or artist answers with an
+  # image; only http(s) links to public addresses are fetched
+  model = MODELS[entity]
+  link = db.session.query(model.image_link).filter(model.id == id).scalar()
+  valid = None
+  if link:
+    valid = False
+    if link.startswith(('http://', 'https://')):
+      request = urllib.request.Request(link, method='HEAD',
+                                       headers={'User-Agent': 'fyyur-image-check'})
+      try:
+        with _image_opener.open(request, timeout=current_app.config.get('IMAGE_CHECK_TIMEOUT', 5)) as response:
+          valid = response.headers.get_content_maintype() == 'image'
+      except (OSError, ValueError):
+        valid = False
+  db.session.query(model).filter(model.id == id) \
+    .update({model.image_link_valid: valid}, synchronize_session=False)
+  db.session.commit()
+
+
+@handler('reindex')
+def reindex(entity):
+  search.rebuild_index(MODELS[entity])
@@ -0,0 +1,41 @@
+"""updated_at
+
+Venue.updated_at, Artist.updated_at and Show.updated_at, read by the
+conditional GET validators (see http_cache.py). Existing rows get the
+time of the upgrade.
+
+SQLite can't add a column whose default is CURRENT_TIMESTAMP, so there
+the tables are rebuilt; this runs before any revision that puts triggers
+on them, which a rebuild would drop.
+
+Revision ID: 010e91f6357f
+Revises: d2d0bd199979
+Create Date: 2026-10-18 18:23:41.873015
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010e91f6357f'
+down_revision = 'd2d0bd199979'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    recreate = 'always' if op.get_bind().dialect.name == 'sqlite' else 'auto'
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate=recreate) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+            batch_op.create_index(batch_op.f(f'ix_{table}_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_updated_at'))
+            batch_op.drop_column('updated_at')
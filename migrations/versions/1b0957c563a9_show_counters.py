@@ -0,0 +1,50 @@
+"""show counters
+
+The upcoming/past show counters of Venue and Artist, and the side each
+show is counted on (see counters.py), filled in from the existing shows
+by counters.rebuild().
+
+rebuild() runs in a session on the migration's own connection: the app's
+db.session would open another one, which can't see the new columns before
+this transaction commits on PostgreSQL, and waits on its lock on SQLite.
+Offline (--sql) there is no data to count; run
+`flask fyyur check-counters --fix` once the script has been applied.
+
+Revision ID: 1b0957c563a9
+Revises: 2ce35e526b08
+Create Date: 2026-10-18 18:23:44.061952
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+import counters
+
+
+# revision identifiers, used by Alembic.
+revision = '1b0957c563a9'
+down_revision = '2ce35e526b08'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Show', sa.Column('counted_as_upcoming', sa.Boolean(), nullable=True))
+    op.create_index('ix_Show_counted_as_upcoming_start_time', 'Show', ['counted_as_upcoming', 'start_time'], unique=False)
+    if not context.is_offline_mode():
+        counters.rebuild(session=Session(bind=op.get_bind()))
+
+
+def downgrade():
+    op.drop_index('ix_Show_counted_as_upcoming_start_time', table_name='Show')
+    with op.batch_alter_table('Show') as batch_op:
+        batch_op.drop_column('counted_as_upcoming')
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
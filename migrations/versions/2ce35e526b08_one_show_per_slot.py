@@ -0,0 +1,52 @@
+"""one show per slot
+
+A venue or an artist can't be booked twice at the same start_time (see
+scheduling.py): the timeline indexes become unique and Show.start_time
+NOT NULL. Before that, the rows that would break them are deleted:
+
+- shows without a start_time, which no page can place;
+- all but the first (lowest id) of the shows sharing a venue and
+  start_time, then likewise an artist and start_time.
+
+Downgrading doesn't bring them back.
+
+Revision ID: 2ce35e526b08
+Revises: 829acf8aec01
+Create Date: 2026-10-18 18:23:43.298561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2ce35e526b08'
+down_revision = '829acf8aec01'
+branch_labels = None
+depends_on = None
+
+SLOTS = ('venue_id', 'artist_id')
+
+
+def upgrade():
+    op.execute('DELETE FROM "Show" WHERE start_time IS NULL')
+    for column in SLOTS:
+        op.execute(
+            f'DELETE FROM "Show" WHERE id NOT IN '
+            f'(SELECT min(id) FROM "Show" GROUP BY {column}, start_time)'
+        )
+    for column in SLOTS:
+        op.drop_index(f'ix_Show_{column}_start_time', table_name='Show')
+    with op.batch_alter_table('Show') as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.DateTime(), nullable=False)
+    for column in SLOTS:
+        op.create_index(f'ix_Show_{column}_start_time', 'Show', [column, 'start_time'], unique=True)
+
+
+def downgrade():
+    for column in SLOTS:
+        op.drop_index(f'ix_Show_{column}_start_time', table_name='Show')
+    with op.batch_alter_table('Show') as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.DateTime(), nullable=True)
+    for column in SLOTS:
+        op.create_index(f'ix_Show_{column}_start_time', 'Show', [column, 'start_time'], unique=False)
@@ -0,0 +1,101 @@
+"""table versions
+
+A version counter per table for Venue, Artist and Show, bumped by triggers
+on every insert, update and delete (see http_cache.py):
+
+- PostgreSQL: a sequence per table, advanced with nextval() by a deferred
+  constraint trigger. nextval() takes no row lock, so concurrent writers
+  never wait on each other here, and the counter moves at commit, not
+  while the write is still invisible to readers.
+- SQLite: a row per table in TableVersion. SQLite already runs one writer
+  at a time, so the row adds no contention.
+
+Revision ID: 58b16cffa763
+Revises: 6b5061134fba
+Create Date: 2026-10-18 18:28:27.296094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '58b16cffa763'
+down_revision = '6b5061134fba'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def sequence(table):
+    return f'{table.lower()}_version_seq'
+
+
+SQLITE_TRIGGERS = [
+    f'CREATE TRIGGER "TableVersion_{table}_{suffix}" AFTER {event} ON "{table}" BEGIN '
+    f'UPDATE "TableVersion" SET version = version + 1 WHERE table_name = \'{table}\'; END'
+    for table in TABLES
+    for suffix, event in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE'))
+]
+
+POSTGRES_TRIGGERS = [
+    f'CREATE SEQUENCE IF NOT EXISTS {sequence(table)}' for table in TABLES
+] + [
+    '''CREATE OR REPLACE FUNCTION table_version_bump() RETURNS trigger AS $$
+BEGIN
+  PERFORM nextval(TG_ARGV[0]::regclass);
+  RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+] + [
+    statement
+    for table in TABLES
+    for statement in (
+        f'''CREATE CONSTRAINT TRIGGER table_version_bump
+AFTER INSERT OR UPDATE OR DELETE ON "{table}"
+DEFERRABLE INITIALLY DEFERRED FOR EACH ROW
+EXECUTE FUNCTION table_version_bump('{sequence(table)}')''',
+        # constraint triggers can't fire on TRUNCATE
+        f'''CREATE TRIGGER table_version_bump_truncate
+AFTER TRUNCATE ON "{table}" FOR EACH STATEMENT
+EXECUTE FUNCTION table_version_bump('{sequence(table)}')''',
+    )
+]
+
+POSTGRES_DROP = [
+    statement
+    for table in TABLES
+    for statement in (f'DROP TRIGGER IF EXISTS table_version_bump ON "{table}"',
+                      f'DROP TRIGGER IF EXISTS table_version_bump_truncate ON "{table}"')
+] + ['DROP FUNCTION IF EXISTS table_version_bump()'] + [
+    f'DROP SEQUENCE IF EXISTS {sequence(table)}' for table in TABLES
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for statement in POSTGRES_TRIGGERS:
+            op.execute(statement)
+        return
+    # not a model: only SQLite has this table (see migrations/env.py)
+    op.create_table('TableVersion',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    for table in TABLES:
+        op.execute(f"INSERT INTO \"TableVersion\" (table_name, version) VALUES ('{table}', 0)")
+    for statement in SQLITE_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for statement in POSTGRES_DROP:
+            op.execute(statement)
+        return
+    # the triggers go with the table
+    for table in TABLES:
+        for suffix in ('ai', 'au', 'ad'):
+            op.execute(f'DROP TRIGGER IF EXISTS "TableVersion_{table}_{suffix}"')
+    op.drop_table('TableVersion')
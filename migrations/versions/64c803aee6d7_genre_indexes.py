@@ -0,0 +1,32 @@
+"""genre indexes
+
+GIN indexes on Venue.genres and Artist.genres for the genre filters
+(genres @> ARRAY[...]) in facets.py. SQLite gets a plain index, which its
+json_each() filters don't use.
+
+Revision ID: 64c803aee6d7
+Revises: f17ad0f2feaa
+Create Date: 2026-10-18 18:23:46.204771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '64c803aee6d7'
+down_revision = 'f17ad0f2feaa'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index(f'ix_{table}_genres', table, ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_genres', table_name=table, postgresql_using='gin')
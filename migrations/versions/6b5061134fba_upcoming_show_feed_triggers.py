@@ -0,0 +1,132 @@
+"""upcoming show feed triggers
+
+Triggers that keep UpcomingShow in step with Show, Venue and Artist row by
+row (see feed.py), and the feed rows of the shows already scheduled.
+
+Revision ID: 6b5061134fba
+Revises: a12189d53e0b
+Create Date: 2026-10-18 18:24:41.801673
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b5061134fba'
+down_revision = 'a12189d53e0b'
+branch_labels = None
+depends_on = None
+
+FEED_COLUMNS = ('show_id, start_time, venue_id, venue_name, venue_city, venue_state, '
+                'artist_id, artist_name, artist_image_link')
+
+# SQLite stores datetimes as 'YYYY-MM-DD HH:MM:SS.ffffff' local time;
+# PostgreSQL timestamps are naive local time, like datetime.now() elsewhere
+NOW = {
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')",
+    'postgresql': 'LOCALTIMESTAMP',
+}
+
+
+def select_new(now):
+    # the feed row of the show in NEW, if it is upcoming
+    return (
+        f'SELECT new.id, new.start_time, v.id, v.name, v.city, v.state, a.id, a.name, a.image_link '
+        f'FROM "Venue" v, "Artist" a '
+        f'WHERE v.id = new.venue_id AND a.id = new.artist_id AND new.start_time > {now}'
+    )
+
+
+SQLITE_TRIGGERS = [
+    f'CREATE TRIGGER "UpcomingShow_show_ai" AFTER INSERT ON "Show" BEGIN '
+    f'INSERT INTO "UpcomingShow" ({FEED_COLUMNS}) {select_new(NOW["sqlite"])}; END',
+    f'CREATE TRIGGER "UpcomingShow_show_au" '
+    f'AFTER UPDATE OF venue_id, artist_id, start_time ON "Show" BEGIN '
+    f'DELETE FROM "UpcomingShow" WHERE show_id = old.id; '
+    f'INSERT INTO "UpcomingShow" ({FEED_COLUMNS}) {select_new(NOW["sqlite"])}; END',
+    f'CREATE TRIGGER "UpcomingShow_show_ad" AFTER DELETE ON "Show" BEGIN '
+    f'DELETE FROM "UpcomingShow" WHERE show_id = old.id; END',
+    f'CREATE TRIGGER "UpcomingShow_venue_au" AFTER UPDATE OF name, city, state ON "Venue" BEGIN '
+    f'UPDATE "UpcomingShow" SET venue_name = new.name, venue_city = new.city, venue_state = new.state '
+    f'WHERE venue_id = new.id; END',
+    f'CREATE TRIGGER "UpcomingShow_artist_au" AFTER UPDATE OF name, image_link ON "Artist" BEGIN '
+    f'UPDATE "UpcomingShow" SET artist_name = new.name, artist_image_link = new.image_link '
+    f'WHERE artist_id = new.id; END',
+]
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS "{name}"'
+    for name in ('UpcomingShow_show_ai', 'UpcomingShow_show_au', 'UpcomingShow_show_ad',
+                 'UpcomingShow_venue_au', 'UpcomingShow_artist_au')
+]
+
+POSTGRES_TRIGGERS = [
+    f'''CREATE OR REPLACE FUNCTION upcoming_show_sync() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM "UpcomingShow" WHERE show_id = OLD.id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO "UpcomingShow" ({FEED_COLUMNS}) {select_new(NOW['postgresql'])};
+  END IF;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+    '''CREATE TRIGGER upcoming_show_sync
+AFTER INSERT OR DELETE OR UPDATE OF venue_id, artist_id, start_time ON "Show"
+FOR EACH ROW EXECUTE FUNCTION upcoming_show_sync()''',
+    '''CREATE OR REPLACE FUNCTION upcoming_show_venue_sync() RETURNS trigger AS $$
+BEGIN
+  UPDATE "UpcomingShow" SET venue_name = NEW.name, venue_city = NEW.city, venue_state = NEW.state
+  WHERE venue_id = NEW.id;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+    '''CREATE TRIGGER upcoming_show_venue_sync
+AFTER UPDATE OF name, city, state ON "Venue" FOR EACH ROW
+WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.city IS DISTINCT FROM NEW.city
+      OR OLD.state IS DISTINCT FROM NEW.state)
+EXECUTE FUNCTION upcoming_show_venue_sync()''',
+    '''CREATE OR REPLACE FUNCTION upcoming_show_artist_sync() RETURNS trigger AS $$
+BEGIN
+  UPDATE "UpcomingShow" SET artist_name = NEW.name, artist_image_link = NEW.image_link
+  WHERE artist_id = NEW.id;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+    '''CREATE TRIGGER upcoming_show_artist_sync
+AFTER UPDATE OF name, image_link ON "Artist" FOR EACH ROW
+WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.image_link IS DISTINCT FROM NEW.image_link)
+EXECUTE FUNCTION upcoming_show_artist_sync()''',
+]
+
+POSTGRES_DROP = [
+    'DROP TRIGGER IF EXISTS upcoming_show_sync ON "Show"',
+    'DROP TRIGGER IF EXISTS upcoming_show_venue_sync ON "Venue"',
+    'DROP TRIGGER IF EXISTS upcoming_show_artist_sync ON "Artist"',
+    'DROP FUNCTION IF EXISTS upcoming_show_sync(), upcoming_show_venue_sync(), upcoming_show_artist_sync()',
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_TRIGGERS, SQLITE_DROP),
+    'postgresql': (POSTGRES_TRIGGERS, POSTGRES_DROP),
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    create, _ = STATEMENTS[dialect]
+    for statement in create:
+        op.execute(statement)
+    # the shows scheduled before the triggers existed
+    op.execute('DELETE FROM "UpcomingShow"')
+    op.execute(
+        f'INSERT INTO "UpcomingShow" ({FEED_COLUMNS}) '
+        f'SELECT s.id, s.start_time, v.id, v.name, v.city, v.state, a.id, a.name, a.image_link '
+        f'FROM "Show" s JOIN "Venue" v ON v.id = s.venue_id JOIN "Artist" a ON a.id = s.artist_id '
+        f'WHERE s.start_time > {NOW[dialect]}'
+    )
+
+
+def downgrade():
+    _, drop = STATEMENTS[op.get_bind().dialect.name]
+    for statement in drop:
+        op.execute(statement)
@@ -0,0 +1,29 @@
+"""show timeline indexes
+
+Composite (venue_id, start_time) and (artist_id, start_time) indexes on
+Show, for the detail pages' show timelines.
+
+Revision ID: 829acf8aec01
+Revises: 010e91f6357f
+Create Date: 2026-10-18 18:23:42.520417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '829acf8aec01'
+down_revision = '010e91f6357f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
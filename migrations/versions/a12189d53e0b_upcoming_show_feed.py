@@ -0,0 +1,48 @@
+"""upcoming show feed
+
+UpcomingShow, the shows that haven't started with their venue and artist
+denormalized (see feed.py). The next revision adds the triggers that fill
+it.
+
+Revision ID: a12189d53e0b
+Revises: 64c803aee6d7
+Create Date: 2026-10-18 18:23:46.931540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a12189d53e0b'
+down_revision = '64c803aee6d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('UpcomingShow',
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('venue_name', sa.String(), nullable=True),
+    sa.Column('venue_city', sa.String(length=120), nullable=True),
+    sa.Column('venue_state', sa.String(length=120), nullable=True),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('artist_name', sa.String(), nullable=True),
+    sa.Column('artist_image_link', sa.String(length=500), nullable=True),
+    sa.ForeignKeyConstraint(['show_id'], ['Show.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('show_id')
+    )
+    op.create_index(op.f('ix_UpcomingShow_artist_id'), 'UpcomingShow', ['artist_id'], unique=False)
+    op.create_index('ix_UpcomingShow_start_time_show_id', 'UpcomingShow', ['start_time', 'show_id'], unique=False)
+    op.create_index('ix_UpcomingShow_venue_city_start_time', 'UpcomingShow', ['venue_city', 'start_time'], unique=False)
+    op.create_index(op.f('ix_UpcomingShow_venue_id'), 'UpcomingShow', ['venue_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_UpcomingShow_venue_id'), table_name='UpcomingShow')
+    op.drop_index('ix_UpcomingShow_venue_city_start_time', table_name='UpcomingShow')
+    op.drop_index('ix_UpcomingShow_start_time_show_id', table_name='UpcomingShow')
+    op.drop_index(op.f('ix_UpcomingShow_artist_id'), table_name='UpcomingShow')
+    op.drop_table('UpcomingShow')
@@ -0,0 +1,46 @@
+"""jobs
+
+The Job outbox of deferred work (see jobs.py), and the image_link_valid
+flags its check_image job sets on Venue and Artist.
+
+Revision ID: a2820a1f2d16
+Revises: 1b0957c563a9
+Create Date: 2026-10-18 18:23:44.790263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2820a1f2d16'
+down_revision = '1b0957c563a9'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    op.create_table('Job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('run_after', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('failed', sa.Boolean(), server_default=sa.false(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_Job_failed_run_after', 'Job', ['failed', 'run_after'], unique=False)
+    for table in TABLES:
+        op.add_column(table, sa.Column('image_link_valid', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('image_link_valid')
+    op.drop_index('ix_Job_failed_run_after', table_name='Job')
+    op.drop_table('Job')
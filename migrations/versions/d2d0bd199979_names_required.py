@@ -0,0 +1,35 @@
+"""names required
+
+Venue.name and Artist.name become NOT NULL: they are the keyset pagination
+keys of the listings (see pagination.py). Rows without a name get an
+empty one first.
+
+Revision ID: d2d0bd199979
+Revises: 0edc0fdf0af0
+Create Date: 2026-10-18 18:23:41.102394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2d0bd199979'
+down_revision = '0edc0fdf0af0'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(f'UPDATE "{table}" SET name = \'\' WHERE name IS NULL')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('name', existing_type=sa.String(), nullable=False)
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('name', existing_type=sa.String(), nullable=True)
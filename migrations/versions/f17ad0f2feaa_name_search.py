@@ -0,0 +1,64 @@
+"""name search
+
+Indexes for the partial-match name search (see search.py): pg_trgm and
+GIN trigram indexes on PostgreSQL, fts5 tables kept in step by triggers
+on SQLite, filled from the rows already there.
+
+Revision ID: f17ad0f2feaa
+Revises: a2820a1f2d16
+Create Date: 2026-10-18 18:23:45.517388
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f17ad0f2feaa'
+down_revision = 'a2820a1f2d16'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+
+
+def fts_statements(base):
+    # an external-content fts5 table over base.name and the triggers that
+    # keep it in step with base
+    fts = base + '_name_fts'
+    return [
+        f'CREATE VIRTUAL TABLE "{fts}" USING fts5('
+        f'name, content=\'{base}\', content_rowid=\'id\', tokenize=\'trigram\')',
+        f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{base}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, name) VALUES (new.id, new.name); END',
+        f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{base}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, name) VALUES (\'delete\', old.id, old.name); END',
+        f'CREATE TRIGGER "{fts}_au" AFTER UPDATE OF name ON "{base}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, name) VALUES (\'delete\', old.id, old.name); '
+        f'INSERT INTO "{fts}"(rowid, name) VALUES (new.id, new.name); END',
+        # index rows already in base
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # gin_trgm_ops, used by the name indexes
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in TABLES:
+        op.create_index(f'ix_{table}_name_trgm', table, ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    if dialect == 'sqlite':
+        for table in TABLES:
+            for statement in fts_statements(table):
+                op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS "{table}_name_fts_{suffix}"')
+            op.execute(f'DROP TABLE IF EXISTS "{table}_name_fts"')
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_name_trgm', table_name=table, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
@@ -0,0 +1,171 @@
+#----------------------------------------------------------------------------#
+# Models.
+#
+# The single db extension the app and every service module share; it is
+# bound to an app by create_app() in app.py. The schema is managed with
+# Flask-Migrate: a model change goes with a revision under migrations/
+# (flask db migrate, then review it), applied with flask db upgrade.
+#----------------------------------------------------------------------------#
+from datetime import datetime
+from sqlalchemy import false, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from database import RoutingSQLAlchemy
+
+db = RoutingSQLAlchemy()
+
+# genre arrays; stored as JSON on SQLite, which has no array type
+GENRES = ARRAY(db.String(120)).with_variant(db.JSON, 'sqlite')
+
+
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+    __table_args__ = (
+        # trigram index backing the partial-match name search (see search.py)
+        db.Index('ix_Venue_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        # genre filters (genres @> ARRAY[...]) in facets.py
+        db.Index('ix_Venue_genres', 'genres', postgresql_using='gin'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # keyset pagination key of /api/v1/venues/browse (see pagination.py)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    # set by the check_image job (jobs.py): None until checked
+    image_link_valid = db.Column(db.Boolean, nullable=True)
+    facebook_link = db.Column(db.String(120))
+    
+    genres = db.Column(GENRES)
+    website = db.Column(db.String(120))
+    seeking_talent = db.Column(db.Boolean)
+    seeking_description = db.Column(db.String())
+    # maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # bumped on every insert/update; read by http_cache.py for ETag/Last-Modified
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime.now,
+                           onupdate=datetime.now, server_default=func.now())
+    shows = db.relationship('Show', back_populates='venue', order_by='Show.start_time')
+
+    def __repr__(self):
+       return f'<id: {self.id}, name: {self.name}>'
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_Artist_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # keyset pagination key of /artists and /api/v1/artists/browse (see pagination.py)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    genres = db.Column(GENRES)
+    image_link = db.Column(db.String(500))
+    # set by the check_image job (jobs.py): None until checked
+    image_link_valid = db.Column(db.Boolean, nullable=True)
+    facebook_link = db.Column(db.String(120))
+                       
+    
+    website = db.Column(db.String())
+    seeking_venue = db.Column(db.Boolean)
+    seeking_description = db.Column(db.String())
+    # maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # bumped on every insert/update; read by http_cache.py for ETag/Last-Modified
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime.now,
+                           onupdate=datetime.now, server_default=func.now())
+    shows = db.relationship('Show', back_populates='artist', order_by='Show.start_time')
+
+    def __repr__(self):
+        return f'<id: {self.id}, name: {self.name}>'
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+
+
+# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+class Show(db.Model):
+    __tablename__ = 'Show'
+    __table_args__ = (
+        # detail pages read one venue's or artist's shows ordered by start_time;
+        # unique, as neither can be booked twice at once (see scheduling.py)
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time', unique=True),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time', unique=True),
+        # shows due to roll from upcoming to past (counters.roll_shows)
+        db.Index('ix_Show_counted_as_upcoming_start_time', 'counted_as_upcoming', 'start_time'),
+    )
+                       
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
+    # keyset pagination key of /shows (see pagination.py)
+    start_time = db.Column(db.DateTime, nullable=False)
+    # counter side this show was added to: None (not yet), True upcoming, False past
+    counted_as_upcoming = db.Column(db.Boolean, nullable=True)
+    # bumped on every insert/update; read by http_cache.py for ETag/Last-Modified
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime.now,
+                           onupdate=datetime.now, server_default=func.now())
+    # many-to-one: load with joinedload()/contains_eager() when iterating shows
+    venue = db.relationship('Venue', back_populates='shows')
+    artist = db.relationship('Artist', back_populates='shows')
+                       
+    def __repr__(self):
+        return f'<id: {self.id}>'
+
+
+class Job(db.Model):
+    # outbox of deferred work triggered by writes; see jobs.py
+    __tablename__ = 'Job'
+    __table_args__ = (
+        # due jobs: failed is false and run_after has passed
+        db.Index('ix_Job_failed_run_after', 'failed', 'run_after'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # not claimed before this; claiming a job pushes it out by JOBS_LEASE
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.now, server_default=func.now())
+    failed = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, server_default=func.now())
+
+    def __repr__(self):
+        return f'<id: {self.id}, kind: {self.kind}>'
+
+
+class UpcomingShow(db.Model):
+    # shows that haven't started, with their venue and artist denormalized;
+    # kept in step with Show, Venue and Artist by triggers (see feed.py)
+    __tablename__ = 'UpcomingShow'
+    __table_args__ = (
+        db.Index('ix_UpcomingShow_start_time_show_id', 'start_time', 'show_id'),
+        db.Index('ix_UpcomingShow_venue_city_start_time', 'venue_city', 'start_time'),
+    )
+
+    show_id = db.Column(db.Integer, db.ForeignKey('Show.id', ondelete='CASCADE'), primary_key=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    venue_id = db.Column(db.Integer, nullable=False, index=True)
+    venue_name = db.Column(db.String)
+    venue_city = db.Column(db.String(120))
+    venue_state = db.Column(db.String(120))
+    artist_id = db.Column(db.Integer, nullable=False, index=True)
+    artist_name = db.Column(db.String)
+    artist_image_link = db.Column(db.String(500))
+
+    def __repr__(self):
+        return f'<show_id: {self.show_id}, start_time: {self.start_time}>'
+
@@ -0,0 +1,50 @@
+#----------------------------------------------------------------------------#
+# Keyset (cursor) pagination for the list pages.
+#----------------------------------------------------------------------------#
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+  pass
+
+
+def encode_cursor(values):
+  payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values],
+                       separators=(',', ':'))
+  return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types):
+  # types converts each position back from its JSON form, e.g. (datetime.fromisoformat, int)
+  try:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if len(values) != len(types):
+      raise ValueError('cursor has %d values, expected %d' % (len(values), len(types)))
+    if None in values:
+      # keys are NOT NULL; a null would compare as unknown and skip rows
+      raise ValueError('cursor has a null value')
+    return [convert(value) for convert, value in zip(types, values)]
+  except (ValueError, TypeError) as e:
+    raise InvalidCursor(str(e))
+
+
+def keyset_page(query, keys, types, after=None, per_page=50):
+  # Returns one page of query ordered by keys, starting strictly after the
+  # position encoded in the `after` cursor, and the cursor of the next page
+  # (None on the last page). keys must be NOT NULL and unique together, e.g.
+  # (name, id), and be selected by the query under their own names: a row
+  # value comparison never matches a NULL key.
+  if per_page < 1:
+    raise ValueError('per_page must be at least 1, not %r' % per_page)
+  if after:
+    query = query.filter(tuple_(*keys) > tuple_(*decode_cursor(after, types)))
+  rows = query.order_by(*keys).limit(per_page + 1).all()
+  next_cursor = None
+  if len(rows) > per_page:
+    rows = rows[:per_page]
+    next_cursor = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+  return rows, next_cursor
@@ -0,0 +1,175 @@
+#----------------------------------------------------------------------------#
+# Per-request SQL and template profiling.
+#
+# Every request records how many statements it ran, the time spent in the
+# database and in render_template, and its slowest statements. The numbers
+# go out as a Server-Timing header and one structured log line per request,
+# and accumulate per endpoint for the Prometheus-text /_metrics endpoint.
+# A statement shape repeated more than SQL_N_PLUS_ONE_THRESHOLD times in one
+# request is logged as a probable N+1.
+#----------------------------------------------------------------------------#
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import Response, before_render_template, current_app, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_IN_LIST = re.compile(r'\bIN \([^)]*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+  # parameters are already placeholders; collapse IN lists of any length
+  return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class RequestProfile:
+
+  def __init__(self):
+    self.started = time.perf_counter()
+    self.queries = 0
+    self.db_time = 0.0
+    self.render_time = 0.0
+    self.statements = []
+    self.shapes = Counter()
+    # render_template can nest (e.g. cached fragments); only the outermost counts
+    self._render_started = []
+
+  def record(self, statement, duration):
+    self.queries += 1
+    self.db_time += duration
+    self.statements.append((duration, statement))
+    self.shapes[statement_shape(statement)] += 1
+
+  def slowest(self, n):
+    return sorted(self.statements, key=lambda s: s[0], reverse=True)[:n]
+
+
+class SQLProfiler:
+
+  def __init__(self, app=None):
+    self.metrics = []
+    self._totals = defaultdict(lambda: defaultdict(float))
+    self._lock = threading.Lock()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    app.config.setdefault('SQL_PROFILER_ENABLED', True)
+    app.config.setdefault('SQL_N_PLUS_ONE_THRESHOLD', 10)
+    app.config.setdefault('SQL_PROFILER_SLOWEST', 3)
+    if not app.config['SQL_PROFILER_ENABLED']:
+      return
+
+    # the engine listeners are process-wide; add them once for every app
+    if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+      event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+      event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+    before_render_template.connect(self._before_render, app)
+    template_rendered.connect(self._after_render, app)
+    app.before_request(self._start)
+    app.after_request(self._finish)
+    app.add_url_rule('/_metrics', 'metrics', self.metrics_view)
+    app.extensions['sql_profiler'] = self
+
+  def register_metric(self, name, help, collect, kind='counter'):
+    # collect() returns the current value of an extra metric for /_metrics
+    self.metrics.append((name, help, collect, kind))
+
+  # SQLAlchemy events ---------------------------------------------------------
+
+  def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+    context._fyyur_query_start = time.perf_counter()
+
+  def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+    profile = g.get('sql_profile') if has_app_context() else None
+    if profile is not None:
+      profile.record(statement, time.perf_counter() - context._fyyur_query_start)
+
+  # Flask hooks ---------------------------------------------------------------
+
+  def _before_render(self, sender, template, context, **extra):
+    profile = g.get('sql_profile')
+    if profile is not None:
+      profile._render_started.append(time.perf_counter())
+
+  def _after_render(self, sender, template, context, **extra):
+    profile = g.get('sql_profile')
+    if profile is not None and profile._render_started:
+      started = profile._render_started.pop()
+      if not profile._render_started:
+        profile.render_time += time.perf_counter() - started
+
+  def _start(self):
+    g.sql_profile = RequestProfile()
+
+  def _finish(self, response):
+    profile = g.pop('sql_profile', None)
+    if profile is None or request.endpoint == 'metrics':
+      return response
+    total = time.perf_counter() - profile.started
+    endpoint = request.endpoint or 'unmatched'
+
+    response.headers.add('Server-Timing', 'db;dur=%.1f;desc="%d queries", render;dur=%.1f, total;dur=%.1f'
+                         % (profile.db_time * 1000, profile.queries, profile.render_time * 1000, total * 1000))
+
+    threshold = current_app.config['SQL_N_PLUS_ONE_THRESHOLD']
+    repeated = [(shape, count) for shape, count in profile.shapes.items() if count > threshold]
+    for shape, count in repeated:
+      current_app.logger.warning('possible N+1 in %s: statement ran %d times: %s', endpoint, count, shape)
+
+    current_app.logger.info(json.dumps({
+      'event': 'request',
+      'method': request.method,
+      'path': request.path,
+      'endpoint': endpoint,
+      'status': response.status_code,
+      'queries': profile.queries,
+      'db_ms': round(profile.db_time * 1000, 2),
+      'render_ms': round(profile.render_time * 1000, 2),
+      'total_ms': round(total * 1000, 2),
+      'slowest': [{'ms': round(d * 1000, 2), 'sql': statement_shape(s)}
+                  for d, s in profile.slowest(current_app.config['SQL_PROFILER_SLOWEST'])],
+    }))
+
+    with self._lock:
+      totals = self._totals[endpoint]
+      totals['requests'] += 1
+      totals['queries'] += profile.queries
+      totals['db_seconds'] += profile.db_time
+      totals['render_seconds'] += profile.render_time
+      totals['seconds'] += total
+      totals['n_plus_one'] += len(repeated)
+    return response
+
+  # /_metrics -----------------------------------------------------------------
+
+  def metrics_view(self):
+    series = (
+      ('fyyur_requests_total', 'Requests served.', 'requests'),
+      ('fyyur_db_queries_total', 'SQL statements executed.', 'queries'),
+      ('fyyur_db_seconds_total', 'Time spent executing SQL.', 'db_seconds'),
+      ('fyyur_render_seconds_total', 'Time spent in render_template.', 'render_seconds'),
+      ('fyyur_request_seconds_total', 'Time spent handling requests.', 'seconds'),
+      ('fyyur_n_plus_one_total', 'Statement shapes repeated past the N+1 threshold.', 'n_plus_one'),
+    )
+    with self._lock:
+      totals = {endpoint: dict(values) for endpoint, values in self._totals.items()}
+    lines = []
+    for name, help, key in series:
+      lines.append('# HELP %s %s' % (name, help))
+      lines.append('# TYPE %s counter' % name)
+      for endpoint, values in sorted(totals.items()):
+        lines.append('%s{endpoint="%s"} %s' % (name, endpoint, _number(values.get(key, 0))))
+    for name, help, collect, kind in self.metrics:
+      lines.append('# HELP %s %s' % (name, help))
+      lines.append('# TYPE %s %s' % (name, kind))
+      lines.append('%s %s' % (name, _number(collect())))
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def _number(value):
+  return '%d' % value if float(value).is_integer() else '%.6f' % value
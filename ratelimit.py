@@ -0,0 +1,115 @@
+#----------------------------------------------------------------------------#
+# Per-client token-bucket rate limiting.
+#
+# Each (scope, client) pair has a bucket of `burst` tokens refilled at `rate`
+# tokens per second; a request takes one token or is answered 429 with a
+# Retry-After header. RATE_LIMIT_BACKEND selects where buckets live:
+# 'memory' (per process, the default) or 'redis' (shared by every process,
+# updated atomically by a Lua script; any client exposing eval() will do).
+#----------------------------------------------------------------------------#
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+
+
+class MemoryBackend:
+  # buckets of the most recently seen max_keys clients, in this process
+
+  def __init__(self, max_keys=100000):
+    self.max_keys = max_keys
+    self._buckets = OrderedDict()
+    self._lock = threading.Lock()
+
+  def take(self, key, rate, burst, now=None):
+    # returns (allowed, seconds until a token is available)
+    now = time.monotonic() if now is None else now
+    with self._lock:
+      tokens, updated = self._buckets.get(key, (burst, now))
+      tokens = min(burst, tokens + (now - updated) * rate)
+      allowed = tokens >= 1
+      if allowed:
+        tokens -= 1
+      self._buckets[key] = (tokens, now)
+      self._buckets.move_to_end(key)
+      while len(self._buckets) > self.max_keys:
+        self._buckets.popitem(last=False)
+    return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+# KEYS[1]: bucket; ARGV: rate, burst, now (seconds). Returns {allowed, wait in ms}.
+TAKE_SCRIPT = '''
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+local wait = 0
+if allowed == 0 then wait = math.ceil((1 - tokens) / rate * 1000) end
+return {allowed, wait}
+'''
+
+
+class RedisBackend:
+
+  def __init__(self, client, prefix='fyyur:ratelimit:'):
+    self.client = client
+    self.prefix = prefix
+
+  def take(self, key, rate, burst, now=None):
+    now = time.time() if now is None else now
+    allowed, wait_ms = self.client.eval(TAKE_SCRIPT, 1, self.prefix + key, rate, burst, now)
+    return bool(allowed), int(wait_ms) / 1000
+
+
+class RateLimiter:
+
+  def __init__(self, app=None, backend=None):
+    self.backend = backend or MemoryBackend()
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app, client=None):
+    app.config.setdefault('RATE_LIMIT_ENABLED', True)
+    kind = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+    if kind == 'memory':
+      self.backend = MemoryBackend(app.config.get('RATE_LIMIT_MAX_KEYS', 100000))
+    elif kind == 'redis':
+      if client is None:
+        import redis
+        client = redis.Redis.from_url(app.config['RATE_LIMIT_REDIS_URL'])
+      self.backend = RedisBackend(client)
+    else:
+      raise ValueError('Unknown RATE_LIMIT_BACKEND %r' % kind)
+    app.extensions['rate_limiter'] = self
+
+  def limit(self, scope):
+    # decorates a view: <SCOPE>_RATE tokens per second and <SCOPE>_BURST
+    # tokens per client, e.g. SEARCH_RATE / SEARCH_BURST for 'search'
+    def decorator(view):
+      @wraps(view)
+      def wrapper(*args, **kwargs):
+        config = current_app.config
+        if config['RATE_LIMIT_ENABLED']:
+          rate = config.get(scope.upper() + '_RATE', 1)
+          burst = config.get(scope.upper() + '_BURST', 10)
+          # behind a proxy, wrap the app in werkzeug's ProxyFix so that
+          # remote_addr is the client's address
+          allowed, wait = self.backend.take('%s:%s' % (scope, request.remote_addr), rate, burst)
+          if not allowed:
+            response = current_app.response_class('Too many requests', status=429,
+                                                   mimetype='text/plain')
+            response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+            return response
+        return view(*args, **kwargs)
+      return wrapper
+    return decorator
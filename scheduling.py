@@ -0,0 +1,173 @@
+#----------------------------------------------------------------------------#
+# Bulk show scheduling.
+#
+# schedule_shows() takes a whole tour schedule at once. Rows are parsed, then
+# checked with a handful of set-based queries: one for the venues that
+# exist, one for the artists, one for the venue/start_time slots and one for
+# the artist/start_time slots already taken. Rows that pass are inserted in
+# a single transaction (one multi-row INSERT ... RETURNING id per chunk on
+# PostgreSQL) and added to the show counters. Each input row gets an
+# outcome: created with its id, or rejected with the reasons.
+#
+# The unique (venue_id, start_time) and (artist_id, start_time) indexes on
+# Show settle races with concurrent submissions: when the insert hits one,
+# the batch is rolled back and its rows are checked again, so the slots
+# the other submission took are rejected like any booked slot.
+#----------------------------------------------------------------------------#
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from models import db, Venue, Artist, Show
+import counters
+
+CREATED = 'created'
+REJECTED = 'rejected'
+
+# rows per INSERT statement, and per IN (...) list in the checks
+CHUNK_SIZE = 1000
+# checks and inserts of one submission before a conflicting insert is raised
+MAX_ATTEMPTS = 3
+
+
+def _chunks(values):
+  values = list(values)
+  for start in range(0, len(values), CHUNK_SIZE):
+    yield values[start:start + CHUNK_SIZE]
+
+
+def _parse(row):
+  # returns ({venue_id, artist_id, start_time}, errors) in form.errors shape
+  errors = {}
+  values = {}
+  for field in ('venue_id', 'artist_id'):
+    try:
+      values[field] = int(row.get(field))
+    except (TypeError, ValueError):
+      errors[field] = ['Not a valid integer value.']
+  start_time = row.get('start_time')
+  try:
+    if not isinstance(start_time, datetime):
+      start_time = datetime.fromisoformat(str(start_time).strip())
+    if start_time.tzinfo is not None:
+      # stored start times are naive local time, like datetime.now()
+      start_time = start_time.astimezone().replace(tzinfo=None)
+    values['start_time'] = start_time
+  except ValueError:
+    errors['start_time'] = ['Not a valid datetime value.']
+  return values, errors
+
+
+def _existing(model, ids):
+  found = set()
+  for chunk in _chunks(ids):
+    found.update(id for id, in db.session.query(model.id).filter(model.id.in_(chunk)))
+  return found
+
+
+def _booked(fk_column, slots):
+  # the (owner id, start_time) pairs among slots that already have a show
+  found = set()
+  for chunk in _chunks(slots):
+    found.update(
+      tuple(row) for row in db.session.query(fk_column, Show.start_time)
+        .filter(tuple_(fk_column, Show.start_time).in_(chunk))
+    )
+  return found
+
+
+def _insert(rows):
+  # returns the new ids in the order of rows
+  if db.session.get_bind().dialect.name == 'postgresql':
+    ids = []
+    for chunk in _chunks(rows):
+      result = db.session.execute(Show.__table__.insert().values(chunk).returning(Show.id))
+      ids.extend(id for id, in result)
+    return ids
+  # no INSERT ... RETURNING here: let the ORM fetch each id
+  shows = [Show(**row) for row in rows]
+  db.session.add_all(shows)
+  db.session.flush()
+  return [show.id for show in shows]
+
+
+def schedule_shows(rows, now=None):
+  # rows: [{venue_id, artist_id, start_time}], start_time as a datetime or an
+  # ISO 8601 string. Returns one outcome per row, in input order:
+  # {'index', 'status', 'id'} or {'index', 'status', 'errors'}. Valid rows
+  # are committed together; rejected rows don't stop the others.
+  outcomes = []
+  accepted = []
+  for index, row in enumerate(rows):
+    values, errors = _parse(row)
+    outcomes.append({'index': index, 'status': REJECTED, 'errors': errors})
+    if not errors:
+      accepted.append((index, values))
+
+  now = now or datetime.now()
+  for attempt in range(1, MAX_ATTEMPTS + 1):
+    to_insert = _check(accepted, outcomes)
+    if not to_insert:
+      return outcomes
+    rows = [values for _, values in to_insert]
+    counters.count_rows(rows, now)
+    try:
+      ids = _insert(rows)
+      db.session.commit()
+      break
+    except IntegrityError:
+      # a concurrent submission took a slot (or deleted a venue or artist)
+      # after the checks; check the batch again now that its write is visible
+      db.session.rollback()
+      if attempt == MAX_ATTEMPTS:
+        raise
+      accepted = to_insert
+    except Exception:
+      db.session.rollback()
+      raise
+
+  for (index, values), id in zip(to_insert, ids):
+    outcomes[index] = {'index': index, 'status': CREATED, 'id': id}
+  _invalidate(rows)
+  return outcomes
+
+
+def _check(accepted, outcomes):
+  # returns the (index, values) of accepted that can be inserted together;
+  # the others get their reasons in outcomes[index]['errors']
+  venues = _existing(Venue, {v['venue_id'] for _, v in accepted})
+  artists = _existing(Artist, {v['artist_id'] for _, v in accepted})
+  venue_booked = _booked(Show.venue_id, {(v['venue_id'], v['start_time']) for _, v in accepted})
+  artist_booked = _booked(Show.artist_id, {(v['artist_id'], v['start_time']) for _, v in accepted})
+
+  to_insert = []
+  for index, values in accepted:
+    errors = outcomes[index]['errors']
+    venue_slot = (values['venue_id'], values['start_time'])
+    artist_slot = (values['artist_id'], values['start_time'])
+    if values['venue_id'] not in venues:
+      errors['venue_id'] = ['Venue does not exist.']
+    elif venue_slot in venue_booked:
+      errors['start_time'] = ['The venue is already booked at this time.']
+    if values['artist_id'] not in artists:
+      errors['artist_id'] = ['Artist does not exist.']
+    elif artist_slot in artist_booked:
+      errors.setdefault('start_time', []).append('The artist is already booked at this time.')
+    if errors:
+      continue
+    # later rows of the same submission can't take a slot an earlier one got
+    venue_booked.add(venue_slot)
+    artist_booked.add(artist_slot)
+    to_insert.append((index, values))
+  return to_insert
+
+
+def _invalidate(rows):
+  # drops the cached detail pages and list fragments the new shows appear on
+  tags = {'venue:%s' % row['venue_id'] for row in rows} \
+       | {'artist:%s' % row['artist_id'] for row in rows}
+  extensions = current_app.extensions
+  if 'cache' in extensions:
+    extensions['cache'].delete(*tags)
+  if 'fragments' in extensions:
+    extensions['fragments'].invalidate(*tags)
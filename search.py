@@ -0,0 +1,113 @@
+#----------------------------------------------------------------------------#
+# Search service shared by the venue and artist search routes.
+#----------------------------------------------------------------------------#
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.sql import column, table
+from models import db, Venue, Artist
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+# the sqlite fts5 trigram tokenizer cannot match terms shorter than a trigram
+MIN_FTS_TERM = 3
+
+#----------------------------------------------------------------------------#
+# Name indexes.
+#
+# PostgreSQL: GIN trigram indexes on the names, declared on the models (the
+# pg_trgm extension is created by the name search migration). SQLite: an
+# external-content fts5 table per name column, "<table>_name_fts", kept in
+# step with the base table by triggers created by the same migration.
+#----------------------------------------------------------------------------#
+
+def _fts_table_name(model):
+  return model.__tablename__ + '_name_fts'
+
+
+def rebuild_index(model):
+  # repopulates the sqlite fts table from the base table; no-op on PostgreSQL,
+  # where the GIN index is maintained by the database itself.
+  if db.engine.dialect.name != 'sqlite':
+    return
+  fts = _fts_table_name(model)
+  db.session.execute(text(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')'))
+  db.session.commit()
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+def _contains(search_term):
+  # an ILIKE pattern for names containing search_term, with its own % and _
+  # matched literally (escape='\\')
+  escaped = search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+  return '%' + escaped + '%'
+
+
+def _match(query, model, search_term):
+  # Narrows query to names containing search_term (case-insensitive) and
+  # returns it with the relevance expression to order by, best match first.
+  dialect = db.session.get_bind().dialect.name
+  if dialect == 'postgresql':
+    # ILIKE is served by the gin_trgm_ops index; rank by trigram similarity
+    query = query.filter(model.name.ilike(_contains(search_term), escape='\\'))
+    return query, func.similarity(model.name, search_term).desc()
+  if dialect == 'sqlite' and len(search_term) >= MIN_FTS_TERM:
+    fts_name = _fts_table_name(model)
+    fts = table(fts_name, column('rowid'), column('rank'))
+    phrase = '"' + search_term.replace('"', '""') + '"'
+    matches = db.session.query(fts.c.rowid.label('id'), fts.c.rank.label('rank')) \
+      .filter(literal_column(f'"{fts_name}"').op('MATCH')(phrase)) \
+      .subquery()
+    query = query.join(matches, matches.c.id == model.id)
+    # fts5 rank is bm25, where lower is better
+    return query, matches.c.rank.asc()
+  query = query.filter(model.name.ilike(_contains(search_term), escape='\\'))
+  return query, None
+
+
+def _search(model, search_term, page=1, per_page=DEFAULT_PER_PAGE):
+  # One query per page: names come with their precomputed upcoming show
+  # counts (see counters.py) and the total number of matches is a window
+  # count, so no per-result queries or aggregation are needed.
+  page = max(int(page or 1), 1)
+  per_page = min(max(int(per_page or DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+
+  query = db.session.query(
+      model.id,
+      model.name,
+      model.upcoming_shows_count.label('num_upcoming_shows'),
+      func.count().over().label('total')
+    )
+  query, relevance = _match(query, model, search_term)
+  order_by = [model.name, model.id] if relevance is None else [relevance, model.name, model.id]
+
+  rows = query \
+    .order_by(*order_by) \
+    .limit(per_page) \
+    .offset((page - 1) * per_page) \
+    .all()
+
+  count = rows[0].total if rows else 0
+  if not rows and page > 1:
+    # past the last page the window count is not available
+    count = query.count()
+
+  return {
+    "count": count,
+    "page": page,
+    "per_page": per_page,
+    "pages": (count + per_page - 1) // per_page,
+    "data": [{
+      "id": row.id,
+      "name": row.name,
+      "num_upcoming_shows": row.num_upcoming_shows
+    } for row in rows]
+  }
+
+
+def search_venues(search_term, page=1, per_page=DEFAULT_PER_PAGE):
+  return _search(Venue, search_term, page, per_page)
+
+
+def search_artists(search_term, page=1, per_page=DEFAULT_PER_PAGE):
+  return _search(Artist, search_term, page, per_page)
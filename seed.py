@@ -0,0 +1,122 @@
+#----------------------------------------------------------------------------#
+# Synthetic Venue/Artist/Show data for benchmarks and load tests.
+#
+# Venues and artists get plausible names, cities and genre arrays; shows
+# pick their venue and artist with Zipf-skewed popularity, so a few venues
+# and artists carry most of the shows as in real listings, and start times
+# spread over the past two years and the next one. No venue or artist gets
+# two shows at the same time.
+#----------------------------------------------------------------------------#
+import itertools
+import random
+from datetime import datetime, timedelta
+from models import db, Venue, Artist, Show
+import bulk
+import counters
+
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk',
+          'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop',
+          'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul', 'Other']
+CITIES = [('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'), ('Chicago', 'IL'),
+          ('Seattle', 'WA'), ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Denver', 'CO'),
+          ('Portland', 'OR'), ('Los Angeles', 'CA'), ('Atlanta', 'GA'), ('Boston', 'MA')]
+VENUE_WORDS = ['Hall', 'Lounge', 'Club', 'Theatre', 'Room', 'Garden', 'Cellar', 'Stage',
+               'Live', 'Coffee', 'Musical', 'Park', 'Square', 'Hop', 'Loft', 'Barn']
+ARTIST_WORDS = ['Band', 'Sax', 'Wild', 'Petals', 'Guns', 'Echo', 'Kings', 'Trio', 'Quartet',
+                'Collective', 'Orchestra', 'Brothers', 'Sisters', 'Electric', 'Velvet', 'Moon']
+# Zipf exponent for venue/artist popularity
+SKEW = 1.1
+# draws for a free slot before a show is left out
+MAX_DRAWS = 100
+
+
+def _name(rng, words, i):
+  return '%s %s %d' % tuple(rng.sample(words, 2) + [i])
+
+
+def venue_rows(rng, count, start=0):
+  for i in range(start, start + count):
+    city, state = rng.choice(CITIES)
+    yield {
+      'name': 'The ' + _name(rng, VENUE_WORDS, i), 'city': city, 'state': state,
+      'address': '%d %s St' % (rng.randint(1, 9999), rng.choice(VENUE_WORDS)),
+      'phone': '%03d-%03d-%04d' % (rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)),
+      'genres': rng.sample(GENRES, rng.randint(1, 4)),
+      'image_link': 'https://images.example.com/venues/%d.jpg' % i,
+      'facebook_link': 'https://www.facebook.com/venue%d' % i,
+      'website': 'https://venue%d.example.com' % i,
+      'seeking_talent': rng.random() < 0.3,
+      'seeking_description': None,
+    }
+
+
+def artist_rows(rng, count, start=0):
+  for i in range(start, start + count):
+    city, state = rng.choice(CITIES)
+    yield {
+      'name': _name(rng, ARTIST_WORDS, i), 'city': city, 'state': state,
+      'phone': '%03d-%03d-%04d' % (rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)),
+      'genres': rng.sample(GENRES, rng.randint(1, 3)),
+      'image_link': 'https://images.example.com/artists/%d.jpg' % i,
+      'facebook_link': 'https://www.facebook.com/artist%d' % i,
+      'website': 'https://artist%d.example.com' % i,
+      'seeking_venue': rng.random() < 0.2,
+      'seeking_description': None,
+    }
+
+
+def _popularity(rng, ids):
+  # cumulative Zipf weights over a shuffled copy of ids
+  ids = list(ids)
+  rng.shuffle(ids)
+  weights = itertools.accumulate(1.0 / (rank ** SKEW) for rank in range(1, len(ids) + 1))
+  return ids, list(weights)
+
+
+def show_rows(rng, count, venue_ids, artist_ids, now=None, taken=()):
+  # taken: (fk column name, id, start_time) slots that already have a show
+  now = now or datetime.now()
+  venues, venue_weights = _popularity(rng, venue_ids)
+  artists, artist_weights = _popularity(rng, artist_ids)
+  taken = set(taken)
+  for _ in range(count):
+    for _ in range(MAX_DRAWS):
+      day = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=rng.randint(-730, 365))
+      row = {
+        'venue_id': rng.choices(venues, cum_weights=venue_weights)[0],
+        'artist_id': rng.choices(artists, cum_weights=artist_weights)[0],
+        'start_time': day + timedelta(hours=rng.choice([18, 19, 20, 21, 22])),
+      }
+      slots = {('venue_id', row['venue_id'], row['start_time']),
+               ('artist_id', row['artist_id'], row['start_time'])}
+      if not slots & taken:
+        taken |= slots
+        yield row
+        break
+
+
+def _load(model, rows, batch_size, report):
+  total = 0
+  while True:
+    batch = list(itertools.islice(rows, batch_size))
+    if not batch:
+      return total
+    bulk.write_batch(model, batch)
+    db.session.commit()
+    total += len(batch)
+    report('%s: %d rows' % (model.__tablename__, total))
+
+
+def generate(venues, artists, shows, seed=42, batch_size=10000, report=lambda message: None):
+  # appends the requested numbers of rows to the current database
+  rng = random.Random(seed)
+  _load(Venue, venue_rows(rng, venues, db.session.query(Venue).count()), batch_size, report)
+  _load(Artist, artist_rows(rng, artists, db.session.query(Artist).count()), batch_size, report)
+  venue_ids = [id for id, in db.session.query(Venue.id)]
+  artist_ids = [id for id, in db.session.query(Artist.id)]
+  if shows and venue_ids and artist_ids:
+    taken = [('venue_id', id, start_time) for id, start_time in db.session.query(Show.venue_id, Show.start_time)]
+    taken += [('artist_id', id, start_time) for id, start_time in db.session.query(Show.artist_id, Show.start_time)]
+    _load(Show, show_rows(rng, shows, venue_ids, artist_ids, taken=taken), batch_size, report)
+    counters.count_uncounted()
+    db.session.commit()
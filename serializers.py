@@ -0,0 +1,31 @@
+#----------------------------------------------------------------------------#
+# Dict shapes shared by the HTML pages and the JSON API.
+#----------------------------------------------------------------------------#
+
+VENUE_FIELDS = ('id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'website',
+                'facebook_link', 'seeking_talent', 'seeking_description', 'image_link')
+
+ARTIST_FIELDS = ('id', 'name', 'genres', 'city', 'state', 'phone', 'website',
+                 'facebook_link', 'seeking_venue', 'seeking_description', 'image_link')
+
+SHOW_FIELDS = ('venue_id', 'venue_name', 'artist_id', 'artist_name', 'artist_image_link',
+               'start_time')
+
+
+def _pick(obj, fields):
+  return {field: getattr(obj, field) for field in fields}
+
+
+def venue_dict(venue):
+  # venue is a Venue or a row selecting VENUE_FIELDS
+  return _pick(venue, VENUE_FIELDS)
+
+
+def artist_dict(artist):
+  # artist is an Artist or a row selecting ARTIST_FIELDS
+  return _pick(artist, ARTIST_FIELDS)
+
+
+def show_dict(show):
+  # show is a row selecting SHOW_FIELDS; start_time stays a datetime
+  return _pick(show, SHOW_FIELDS)
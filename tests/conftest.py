@@ -0,0 +1,89 @@
+#----------------------------------------------------------------------------#
+# Fixtures for the tests.
+#
+# The app runs against a SQLite database of its own in a temporary
+# directory, brought up with the migrations, with background jobs and rate
+# limiting off and the detail-page cache disabled. Every test starts with
+# empty tables.
+#----------------------------------------------------------------------------#
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_DIR = tempfile.mkdtemp(prefix='fyyur-tests-')
+os.environ.update({
+  'DATABASE_URL': 'sqlite:///' + os.path.join(DATABASE_DIR, 'fyyur.db'),
+  'CACHE_BACKEND': 'null',
+  'JOBS_WORKERS': '0',
+  'RATE_LIMIT_ENABLED': '0',
+})
+os.environ.pop('DATABASE_REPLICA_URL', None)
+
+
+@pytest.fixture(scope='session')
+def app():
+  pytest.importorskip('forms')
+  from flask_migrate import upgrade
+  from app import create_app, init_migrate
+
+  app = create_app()
+  app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+  init_migrate(app)
+  with app.app_context():
+    upgrade()
+    yield app
+  shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def empty_tables(request):
+  yield
+  if 'app' not in request.fixturenames:
+    return
+  from models import db, Venue, Artist, Show, Job
+  db.session.rollback()
+  for model in (Show, Venue, Artist, Job):
+    db.session.query(model).delete()
+  db.session.commit()
+  db.session.remove()
+  request.getfixturevalue('app').extensions['fragments'].clear()
+
+
+@pytest.fixture
+def client(app):
+  return app.test_client()
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+  # the views render through this instead of the page templates: it records
+  # (template name, context) so a test sees the data a page gets
+  import app as app_module
+  calls = []
+
+  def render_template(name, **context):
+    calls.append((name, context))
+    return ''
+
+  monkeypatch.setattr(app_module, 'render_template', render_template)
+  return calls
+
+
+@pytest.fixture
+def statements():
+  # the SQL statements sent to the database while a test runs, as seen by
+  # before_cursor_execute on every engine
+  from sqlalchemy import event
+  from sqlalchemy.engine import Engine
+  sent = []
+
+  def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sent.append(statement)
+
+  event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+  yield sent
+  event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
@@ -0,0 +1,45 @@
+#----------------------------------------------------------------------------#
+# Response formats of the streaming listings (/api/v1).
+#----------------------------------------------------------------------------#
+import json
+
+import pytest
+
+# app.py imports the WTForms definitions from forms.py
+pytest.importorskip('forms')
+
+from models import db, Venue
+
+
+@pytest.fixture
+def venues(app):
+  db.session.add_all([Venue(name='The Musical Hop'), Venue(name='The Dueling Pianos Bar')])
+  db.session.commit()
+
+
+@pytest.mark.parametrize('accept', [
+  None,
+  '*/*',
+  'application/*',
+  'application/json',
+  'application/x-ndjson, application/json',
+  'application/json, application/x-ndjson;q=0.5',
+])
+def test_json_array_by_default(client, venues, accept):
+  headers = {'Accept': accept} if accept else {}
+  response = client.get('/api/v1/venues', headers=headers)
+  mimetype, body = response.mimetype, response.get_data(as_text=True)
+  assert mimetype == 'application/json'
+  assert len(json.loads(body)) == 2
+
+
+@pytest.mark.parametrize('path, accept', [
+  ('/api/v1/venues?format=ndjson', '*/*'),
+  ('/api/v1/venues', 'application/x-ndjson'),
+  ('/api/v1/venues', 'application/x-ndjson, */*;q=0.1'),
+])
+def test_ndjson_when_named(client, venues, path, accept):
+  response = client.get(path, headers={'Accept': accept})
+  mimetype, body = response.mimetype, response.get_data(as_text=True)
+  assert mimetype == 'application/x-ndjson'
+  assert len([json.loads(line) for line in body.splitlines()]) == 2
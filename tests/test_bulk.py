@@ -0,0 +1,48 @@
+#----------------------------------------------------------------------------#
+# Bulk import (bulk.py) on the test database.
+#----------------------------------------------------------------------------#
+import io
+import pytest
+
+# app.py imports the WTForms definitions from forms.py
+pytest.importorskip('forms')
+
+from models import db, Venue, Artist, Show
+import bulk
+
+
+def test_empty_list_cell_reads_as_empty_list():
+  stream = io.StringIO('name,genres\nThe Musical Hop,\nPark Square,Jazz;Swing\n')
+  rows = [row for _, row in bulk.read_rows(stream, 'csv')]
+  assert rows == [{'name': 'The Musical Hop', 'genres': []},
+                  {'name': 'Park Square', 'genres': ['Jazz', 'Swing']}]
+
+
+def test_empty_list_cell_imports(app, tmp_path):
+  path = tmp_path / 'venues.csv'
+  path.write_text('name,genres\nThe Musical Hop,\n')
+  imported, errors = bulk.import_file('venue', str(path), report=lambda message: None)
+  assert (imported, errors) == (1, [])
+  assert db.session.query(Venue.genres).scalar() == []
+
+
+def test_show_import_rejects_missing_venue_and_artist(app, tmp_path):
+  venue = Venue(name='The Musical Hop')
+  artist = Artist(name='Guns N Petals')
+  db.session.add_all([venue, artist])
+  db.session.commit()
+  path = tmp_path / 'shows.csv'
+  path.write_text(
+    'venue_id,artist_id,start_time\n'
+    '%d,%d,2035-04-01 20:00:00\n'
+    '%d,%d,2035-04-02 20:00:00\n'
+    '%d,%d,2035-04-03 20:00:00\n'
+    % (venue.id, artist.id, venue.id + 1, artist.id, venue.id, artist.id + 1)
+  )
+  imported, errors = bulk.import_file('show', str(path), report=lambda message: None)
+  assert imported == 1
+  assert [(e.line, e.errors) for e in errors] == [
+    (3, {'venue_id': ['Venue does not exist.']}),
+    (4, {'artist_id': ['Artist does not exist.']}),
+  ]
+  assert db.session.query(Show.venue_id, Show.artist_id).all() == [(venue.id, artist.id)]
@@ -0,0 +1,56 @@
+#----------------------------------------------------------------------------#
+# Faceted browse (/api/v1/<kind>/browse) on the test database.
+#----------------------------------------------------------------------------#
+import pytest
+
+# app.py imports the WTForms definitions from forms.py
+pytest.importorskip('forms')
+
+from models import db, Venue, Artist
+
+
+@pytest.fixture
+def venues(app):
+  db.session.add_all([
+    Venue(name='Park Square Live Music & Coffee', city='San Francisco', state='CA',
+          genres=['Jazz', 'Rock n Roll']),
+    Venue(name='The Musical Hop', city='San Francisco', state='CA', genres=['Jazz']),
+    Venue(name='The Dueling Pianos Bar', city='New York', state='NY', genres=[]),
+  ])
+  db.session.commit()
+
+
+def browse(client, path):
+  response = client.get(path)
+  assert response.status_code == 200, response.status_code
+  data = response.get_json()
+  return [row['name'] for row in data['data']], data['facets']
+
+
+def test_browse_without_filters(client, venues):
+  names, facets = browse(client, '/api/v1/venues/browse')
+  assert len(names) == 3
+  assert facets['genres'] == [{'genre': 'Jazz', 'count': 2}, {'genre': 'Rock n Roll', 'count': 1}]
+  assert facets['areas'] == [{'city': 'San Francisco', 'state': 'CA', 'count': 2},
+                             {'city': 'New York', 'state': 'NY', 'count': 1}]
+
+
+def test_browse_by_genres(client, venues):
+  names, facets = browse(client, '/api/v1/venues/browse?genre=Jazz')
+  assert names == ['Park Square Live Music & Coffee', 'The Musical Hop']
+  assert facets['areas'] == [{'city': 'San Francisco', 'state': 'CA', 'count': 2}]
+
+  # every requested genre must match
+  names, facets = browse(client, '/api/v1/venues/browse?genre=Jazz&genre=Rock+n+Roll')
+  assert names == ['Park Square Live Music & Coffee']
+  assert facets['genres'] == [{'genre': 'Jazz', 'count': 1}, {'genre': 'Rock n Roll', 'count': 1}]
+
+  assert browse(client, '/api/v1/venues/browse?genre=Folk') == ([], {'genres': [], 'areas': []})
+
+
+def test_browse_artists(client, app):
+  db.session.add(Artist(name='Guns N Petals', city='San Francisco', state='CA', genres=['Rock n Roll']))
+  db.session.commit()
+  names, facets = browse(client, '/api/v1/artists/browse?genre=Rock+n+Roll&city=San+Francisco')
+  assert names == ['Guns N Petals']
+  assert facets['genres'] == [{'genre': 'Rock n Roll', 'count': 1}]
@@ -0,0 +1,54 @@
+#----------------------------------------------------------------------------#
+# Conditional GET (http_cache.conditional) on a page of its own, with the
+# validator's last-modified time set by the test.
+#----------------------------------------------------------------------------#
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+from werkzeug.http import http_date
+
+from http_cache import conditional
+
+
+@pytest.fixture
+def page():
+  # (client, state): the page's validator returns state['last_modified']
+  state = {}
+  app = Flask(__name__)
+  app.secret_key = 'test'
+
+  @app.route('/page')
+  @conditional(lambda: (state['last_modified'], 1))
+  def view():
+    return 'page'
+
+  return app.test_client(), state
+
+
+def test_last_modified_rounds_up_to_the_second(page):
+  client, state = page
+  changed = (datetime.now() - timedelta(seconds=10)).replace(microsecond=500000)
+  state['last_modified'] = changed
+  changed = changed.astimezone(timezone.utc)
+  second_start = changed.replace(microsecond=0)
+  second_end = second_start + timedelta(seconds=1)
+
+  response = client.get('/page')
+  assert response.status_code == 200
+  assert response.last_modified == second_end
+  # a date inside the second the page changed in is older than the change
+  response = client.get('/page', headers={'If-Modified-Since': http_date(second_start)})
+  assert response.status_code == 200
+  response = client.get('/page', headers={'If-Modified-Since': http_date(second_end)})
+  assert response.status_code == 304
+
+
+def test_no_last_modified_before_its_second_is_over(page):
+  client, state = page
+  # changed in a second that hasn't ended yet
+  state['last_modified'] = datetime.now() + timedelta(seconds=1)
+  response = client.get('/page')
+  assert response.status_code == 200
+  assert response.last_modified is None
+  assert response.get_etag()[0]
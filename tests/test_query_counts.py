@@ -0,0 +1,88 @@
+#----------------------------------------------------------------------------#
+# The read pages issue a fixed number of statements, however many rows they
+# render: nothing is loaded per row.
+#----------------------------------------------------------------------------#
+import pytest
+
+# app.py and seed.py import the WTForms definitions from forms.py
+pytest.importorskip('forms')
+
+from datetime import datetime, timedelta
+
+from models import db, Venue, Artist, Show
+from seed import CITIES
+
+
+def get_venues(client, statements):
+  del statements[:]
+  response = client.get('/venues')
+  assert response.status_code == 200, response.status_code
+  return len(statements)
+
+
+def book(venues, artists, days, hour=20):
+  # a show for each venue/artist pair in turn, on the given days from today
+  today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+  db.session.add_all([
+    Show(venue_id=venue.id, artist_id=artist.id, start_time=today + timedelta(days=day, hours=hour))
+    for day, (venue, artist) in zip(days, [(v, a) for v in venues for a in artists])
+  ])
+
+
+def test_venues_statements_do_not_grow_with_areas(app, client, rendered, statements):
+  db.session.add(Venue(name='The Musical Hop', city='San Francisco', state='CA'))
+  db.session.commit()
+  one_area = get_venues(client, statements)
+  assert len(rendered[-1][1]['areas']) == 1
+
+  db.session.add_all([
+    Venue(name='Venue %d' % i, city=city, state=state)
+    for i, (city, state) in enumerate(CITIES * 3)
+  ])
+  db.session.commit()
+  many_areas = get_venues(client, statements)
+  assert len(rendered[-1][1]['areas']) == len(CITIES)
+
+  assert one_area == many_areas, (one_area, many_areas)
+
+
+@pytest.mark.parametrize('path', [
+  '/venues',
+  '/artists',
+  '/shows',
+  '/shows?city=San+Francisco',
+  '/venues/%(venue)d',
+  '/artists/%(artist)d',
+])
+def test_statements_do_not_grow_with_rows(app, client, rendered, statements, path):
+  # a page with one row (or one past and one upcoming show), then the same
+  # page with many: the number of statements stays the same
+  venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+  artist = Artist(name='Guns N Petals')
+  db.session.add_all([venue, artist])
+  db.session.flush()
+  book([venue], [artist], [-1])
+  book([venue], [artist], [1])
+  db.session.commit()
+  path = path % {'venue': venue.id, 'artist': artist.id}
+
+  def count():
+    app.extensions['fragments'].clear()
+    del statements[:]
+    response = client.get(path)
+    assert response.status_code == 200, response.status_code
+    return len(statements)
+
+  one = count()
+  # venues in every area and as many artists, with past and upcoming shows
+  # at the first venue and by the first artist
+  venues = [Venue(name='Venue %d' % i, city=city, state=state) for i, (city, state) in enumerate(CITIES)]
+  artists = [Artist(name='Artist %d' % i) for i in range(len(CITIES))]
+  db.session.add_all(venues + artists)
+  db.session.flush()
+  book([venue], artists, range(-6, 6), hour=18)
+  book(venues, [artist], range(-6, 6), hour=22)
+  db.session.commit()
+  many = count()
+
+  assert one == many, (one, many)
@@ -0,0 +1,32 @@
+#----------------------------------------------------------------------------#
+# Name search (search.py) on the test database.
+#----------------------------------------------------------------------------#
+import pytest
+
+# app.py imports the WTForms definitions from forms.py
+pytest.importorskip('forms')
+
+from models import db, Venue
+import search
+
+
+@pytest.fixture
+def venues(app):
+  db.session.add_all([Venue(name=name) for name in ('100% Jazz', '100 Jazz', 'A_B', 'AXB')])
+  db.session.commit()
+
+
+def names(result):
+  return sorted(row['name'] for row in result['data'])
+
+
+@pytest.mark.parametrize('term, expected', [
+  # shorter than a trigram: the ILIKE path
+  ('%', ['100% Jazz']),
+  ('_', ['A_B']),
+  ('0%', ['100% Jazz']),
+  ('A_', ['A_B']),
+  ('a', ['100 Jazz', '100% Jazz', 'AXB', 'A_B']),
+])
+def test_wildcards_match_literally(app, venues, term, expected):
+  assert names(search.search_venues(term)) == expected
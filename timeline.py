@@ -0,0 +1,57 @@
+#----------------------------------------------------------------------------#
+# Past/upcoming show timeline for the venue and artist detail pages.
+#----------------------------------------------------------------------------#
+from datetime import datetime
+from sqlalchemy import case, func
+from models import db, Show
+
+
+def timeline_query(owner_column, owner_id, join_model, join_on, columns, limit=None):
+  # Selects the past and upcoming shows of one venue or artist in a single
+  # ordered query. The database flags each show as upcoming against now and
+  # numbers the rows on each side (upcoming soonest first, past most recent
+  # first), so an optional per-side limit is applied in SQL as well.
+  #
+  # owner_column is Show.venue_id or Show.artist_id, join_model/join_on the
+  # other side of the show and columns the labelled columns each row needs.
+  upcoming = (Show.start_time > datetime.now())
+  position = func.row_number().over(
+    partition_by=upcoming,
+    order_by=(case((upcoming, Show.start_time)).asc(), Show.start_time.desc())
+  )
+  timeline = db.session.query(
+      Show.start_time.label('start_time'),
+      upcoming.label('upcoming'),
+      position.label('position'),
+      func.count().over(partition_by=upcoming).label('side_count'),
+      *columns
+    ).join(join_model, join_on) \
+    .filter(owner_column == owner_id) \
+    .subquery()
+
+  query = db.session.query(timeline)
+  if limit:
+    query = query.filter(timeline.c.position <= limit)
+  return query.order_by(timeline.c.upcoming, timeline.c.position)
+
+
+def split_timeline(rows, columns):
+  # turns the rows of timeline_query() into the detail page's show lists
+  result = {
+    "past_shows": [],
+    "upcoming_shows": [],
+    "past_shows_count": 0,
+    "upcoming_shows_count": 0,
+    # when the soonest upcoming show turns into a past one
+    "next_start_time": None,
+  }
+  for row in rows:
+    side = 'upcoming' if row.upcoming else 'past'
+    if row.upcoming and row.position == 1:
+      result["next_start_time"] = row.start_time
+    show = {column.key: getattr(row, column.key) for column in columns}
+    show["start_time"] = row.start_time
+    result[side + '_shows'].append(show)
+    result[side + '_shows_count'] = row.side_count
+  return result
+